@@ -88,6 +88,37 @@ def parse_options(argv):
                         help='The MAAS node hostname to deploy to. Useful '
                         'for using lower end hardware as the Juju admin '
                         'controller.', metavar='<host>.maas')
+    parser.add_argument('--deploy-engine', dest='deploy_engine',
+                        choices=['services', 'changeset'],
+                        default='services',
+                        help='How to deploy the bundle: each application '
+                        'on its own (services), or by planning the whole '
+                        'bundle up front and batching API calls '
+                        '(changeset).')
+    parser.add_argument('--machines-in-flight', dest='machines_in_flight',
+                        type=int, default=50, metavar='<count>',
+                        help='Maximum number of machines to request from '
+                        'the controller at once when deploying bundles '
+                        'with many machines.')
+    parser.add_argument('--step-concurrency', dest='step_concurrency',
+                        type=int, default=4, metavar='<count>',
+                        help='Maximum number of post-deployment steps to '
+                        'run at once, for spells whose steps can run in '
+                        'parallel.')
+    parser.add_argument('--ui-frame-rate', dest='ui_frame_rate',
+                        type=int, default=20, metavar='<fps>',
+                        help='Maximum number of times a second to update '
+                        'status messages on screen.')
+    parser.add_argument('--progress-format', dest='progress_format',
+                        choices=['text', 'jsonl'], default='text',
+                        help='How to report progress in headless mode: '
+                        'messages (text), or one JSON event per line '
+                        'for automation (jsonl).')
+    parser.add_argument('--timeline-trace', action='store_true',
+                        dest='timeline_trace',
+                        help='Also save the deployment timeline as Chrome '
+                        'trace-event JSON (timeline.json in the spell '
+                        'directory).')
     parser.add_argument('--redis-port', dest='redis_port',
                         help='Redis port to connect to',
                         default=6379)
@@ -27,7 +27,18 @@ juju = SimpleNamespace(
     client=None,
 
     # Is authenticated?
-    authenticated=False
+    authenticated=False,
+
+    # Connected controller API clients, keyed by controller name
+    controllers={},
+
+    # Relations added or being added to the current model, keyed by
+    # sorted endpoint pair, see juju.add_relation
+    relations={},
+
+    # Machines being added to the current model, as futures of their
+    # machine IDs keyed by bundle machine number, see juju.add_machines
+    machines={}
 )
 
 
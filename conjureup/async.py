@@ -1,13 +1,31 @@
 """ Async Handler
 Provides async operations for various api calls and other non-blocking
 work.
+
+Work is submitted to named queues (lanes) which share a single pool of
+MAX_WORKERS threads.  Each lane has its own concurrency limit, so that one
+kind of work can't hold every thread, and a priority, which decides which
+lane's work is started first when a thread frees up.  Lanes may also bound
+how much work they queue, with a policy for what to do when full:
+
+    DROP_NEWEST  new work is ignored
+    DROP_OLDEST  the oldest queued work is cancelled
+    LATEST       work submitted with the same key as queued work replaces
+                 it, with both submitters getting the newer work's result;
+                 otherwise as DROP_OLDEST
+
+Lanes which haven't been configured run one thing at a time, with no limit
+on what they queue.
 """
 
+import asyncio
 import logging
 import time
-from collections import OrderedDict, defaultdict
-from concurrent.futures import ThreadPoolExecutor
-from threading import Event
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event, Lock
+
+from conjureup.app_config import app
 
 log = logging.getLogger("async")
 
@@ -18,8 +36,12 @@ class ThreadCancelledException(Exception):
 
 ShutdownEvent = Event()
 
-_queues = defaultdict(lambda: ThreadPoolExecutor(1))
 DEFAULT_QUEUE = "DEFAULT"
+MAX_WORKERS = 8
+
+DROP_NEWEST = 'drop-newest'
+DROP_OLDEST = 'drop-oldest'
+LATEST = 'latest'
 
 ENABLE_LOG = False
 if ENABLE_LOG:
@@ -27,8 +49,150 @@ if ENABLE_LOG:
     _queueLog = defaultdict(OrderedDict)
 
 
-def submit(func, exc_callback, queue_name="DEFAULT"):
+class Lane:
+    def __init__(self, name, concurrency=1, max_queued=None,
+                 policy=DROP_OLDEST, priority=0):
+        """
+        Arguments:
+        name: name of the lane
+        concurrency: maximum number of the lane's work to run at once
+        max_queued: maximum amount of the lane's work to queue, or None
+        policy: what to do when the queue is full, see module docstring
+        priority: lanes with higher priorities have their work run first
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.policy = policy
+        self.priority = priority
+        self.queued = deque()
+        self.running = 0
+        self.dropped = 0
+
+
+class Executor:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers)
+        self.lanes = {}
+        self.running = 0
+        self.lock = Lock()
+
+    def configure_lane(self, name, **kwargs):
+        """ Sets up a lane, see Lane
+        """
+        with self.lock:
+            lane = Lane(name, **kwargs)
+            old_lane = self.lanes.get(name)
+            if old_lane is not None:
+                lane.queued = old_lane.queued
+                lane.running = old_lane.running
+            self.lanes[name] = lane
+            return lane
+
+    def submit(self, func, lane_name=DEFAULT_QUEUE, key=None):
+        """ Queues func to be run in a thread
+
+        Arguments:
+        func: function to run, with no arguments
+        lane_name: lane to run the function in
+        key: identifies the work, for lanes with the LATEST policy
+
+        Returns:
+        concurrent.futures.Future of the result, or None if the lane is
+        full and dropping new work
+        """
+        with self.lock:
+            lane = self.lanes.get(lane_name)
+            if lane is None:
+                lane = self.lanes[lane_name] = Lane(lane_name)
+
+            if lane.policy == LATEST and key is not None:
+                for i, (_, queued_future, queued_key) in \
+                        enumerate(lane.queued):
+                    if queued_key == key:
+                        # take over the queued work's place and future
+                        lane.queued[i] = (func, queued_future, key)
+                        return queued_future
+
+            if lane.max_queued is not None and \
+                    len(lane.queued) >= lane.max_queued:
+                lane.dropped += 1
+                if lane.policy == DROP_NEWEST:
+                    log.debug("{} queue full, dropping {}".format(
+                        lane.name, func))
+                    return None
+                _, dropped_future, _ = lane.queued.popleft()
+                log.debug("{} queue full, dropping oldest".format(lane.name))
+                dropped_future.cancel()
+
+            future = Future()
+            lane.queued.append((func, future, key))
+            self._dispatch()
+            return future
+
+    def _dispatch(self):
+        """ Starts queued work while there are free threads, highest
+        priority lanes first; the lock must be held
+        """
+        while self.running < self.max_workers:
+            ready = [lane for lane in self.lanes.values()
+                     if lane.queued and lane.running < lane.concurrency]
+            if not ready:
+                return
+            lane = max(ready, key=lambda lane: lane.priority)
+            func, future, _ = lane.queued.popleft()
+            lane.running += 1
+            self.running += 1
+            self.pool.submit(self._run, lane, func, future)
+
+    def _run(self, lane, func, future):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = func()
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            with self.lock:
+                lane.running -= 1
+                self.running -= 1
+                self._dispatch()
+
+    def shutdown(self):
+        """ Cancels all queued work
+        """
+        with self.lock:
+            for lane in self.lanes.values():
+                while lane.queued:
+                    lane.queued.popleft()[1].cancel()
+        self.pool.shutdown(wait=False)
+
+    def stats(self):
+        """ Returns the queued, running and dropped work of each lane
+        """
+        with self.lock:
+            return {name: {'queued': len(lane.queued),
+                           'running': lane.running,
+                           'dropped': lane.dropped}
+                    for name, lane in self.lanes.items()}
+
+
+_executor = Executor()
+
+
+def configure_lane(name, **kwargs):
+    """ Sets up a queue, see Lane
+    """
+    return _executor.configure_lane(name, **kwargs)
+
+
+def submit(func, exc_callback, queue_name=DEFAULT_QUEUE, key=None):
     def cb(cb_f):
+        if cb_f.cancelled():
+            return
         e = cb_f.exception()
         if e:
             exc_callback(e)
@@ -43,7 +207,9 @@ def submit(func, exc_callback, queue_name="DEFAULT"):
     if ShutdownEvent.is_set():
         log.debug("ignoring async.submit due to impending shutdown.")
         return None
-    f = _queues[queue_name].submit(func)
+    f = _executor.submit(func, queue_name, key)
+    if f is None:
+        return None
     if ENABLE_LOG:
         _queueLog[queue_name][func] = ("added", time.time(), None, None, None)
         q.q(qstatsf())
@@ -51,6 +217,18 @@ def submit(func, exc_callback, queue_name="DEFAULT"):
     return f
 
 
+def submit_async(func, queue_name=DEFAULT_QUEUE, key=None):
+    """ Like submit, but returns an asyncio future on app.loop to await
+
+    Raises ThreadCancelledException if the work was not queued.
+    """
+    f = submit(func, lambda _: None, queue_name, key)
+    if f is None:
+        raise ThreadCancelledException(
+            "Work not queued on {}".format(queue_name))
+    return asyncio.wrap_future(f, loop=app.loop)
+
+
 def qstatsf():
     s = ""
     for queue, od in _queueLog.items():
@@ -62,8 +240,7 @@ def qstatsf():
 
 def shutdown():
     ShutdownEvent.set()
-    for queue in _queues.values():
-        queue.shutdown(wait=False)
+    _executor.shutdown()
 
 
 def sleep_until(s):
@@ -3,14 +3,28 @@
 Api for the charmstore:
 https://github.com/juju/charmstore/blob/v5/docs/API.md
 """
+import json
+import os
 import os.path as path
+import time
+from threading import Lock
 
 import requests
 import yaml
 
+from conjureup.app_config import app
+
 cs = 'https://api.jujucharms.com/v5'
 CHANNELS = ['stable', 'candidate', 'beta', 'edge']
 
+# How long a resolved charm revision is trusted before asking the charm
+# store again
+REVISION_CACHE_TTL = 60 * 60
+
+_revision_cache = None
+_revision_cache_lock = Lock()
+_revision_futures = {}
+
 
 def get_file(bundle, dst):
     """ Pulls a single file from the charmstore
@@ -87,3 +101,71 @@ def search(tags, promulgated=True):
         raise Exception(
             "Problem getting tagged bundles: {}".format(req))
     return req.json()
+
+
+def _revision_cache_path():
+    return path.join(app.argv.cache_dir, 'charm-revisions.json')
+
+
+def _cached_revision(key):
+    """ Looks up a resolved charm ID in the on-disk revision cache
+
+    Arguments:
+    key: charm ID and channel, joined with '@'
+
+    Returns:
+    resolved charm ID, or None if not cached or expired
+    """
+    global _revision_cache
+    with _revision_cache_lock:
+        if _revision_cache is None:
+            try:
+                with open(_revision_cache_path()) as fp:
+                    _revision_cache = json.load(fp)
+            except (IOError, ValueError):
+                _revision_cache = {}
+        entry = _revision_cache.get(key)
+    if entry and time.time() - entry['fetched'] < REVISION_CACHE_TTL:
+        return entry['id']
+    return None
+
+
+def _store_revision(key, charm_id):
+    with _revision_cache_lock:
+        _revision_cache[key] = {'id': charm_id, 'fetched': time.time()}
+        tmp_path = _revision_cache_path() + '.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(_revision_cache, fp)
+        os.replace(tmp_path, _revision_cache_path())
+
+
+def _resolve_revision(charm_id, channel):
+    key = '{}@{}'.format(charm_id, channel)
+    resolved = _cached_revision(key)
+    if resolved is None:
+        info = get_channel_info(charm_id.replace('cs:', '', 1), channel)
+        resolved = info['Id']
+        _store_revision(key, resolved)
+    return resolved
+
+
+def resolve_revision(charm_id, channel='stable'):
+    """ Resolves a charm ID without a revision to the charm store's latest
+    revision of it in the given channel
+
+    Lookups run in the background and each charm is only looked up once
+    per run; results are also cached on disk for REVISION_CACHE_TTL so
+    that repeat runs can skip the charm store entirely.
+
+    Arguments:
+    charm_id: charm ID without a revision (ie cs:xenial/mysql)
+    channel: the release channel (ie stable, candidate, beta, edge)
+
+    Returns:
+    Future for the charm ID with revision (ie cs:xenial/mysql-58)
+    """
+    key = (charm_id, channel)
+    if key not in _revision_futures:
+        _revision_futures[key] = app.loop.run_in_executor(
+            None, _resolve_revision, charm_id, channel)
+    return _revision_futures[key]
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from conjureup import events, juju, utils
+from conjureup import events, juju, progress, timeline, utils
 from conjureup.app_config import app
 from conjureup.models.provider import load_schema
 from conjureup.models.step import StepModel
@@ -25,26 +25,40 @@ class BaseBootstrapController:
 
     async def do_add_model(self):
         self.emit('Creating Juju model.')
+        progress.emit('bootstrap', status='adding-model',
+                      controller=app.current_controller,
+                      model=app.current_model)
         await juju.add_model(app.current_model,
                              app.current_controller,
                              app.current_cloud,
                              app.current_credential)
         self.emit('Juju model created.')
+        progress.emit('bootstrap', status='completed',
+                      controller=app.current_controller,
+                      model=app.current_model)
         events.Bootstrapped.set()
 
     async def do_bootstrap(self):
         await self.pre_bootstrap()
         self.emit('Bootstrapping Juju controller.')
+        progress.emit('bootstrap', status='started',
+                      controller=app.current_controller,
+                      cloud=app.current_cloud)
         track_event("Juju Bootstrap", "Started", "")
         cloud_with_region = app.current_cloud
         if app.current_region:
             cloud_with_region = '/'.join([app.current_cloud,
                                           app.current_region])
-        success = await juju.bootstrap(app.current_controller,
-                                       cloud_with_region,
-                                       app.current_model,
-                                       credential=app.current_credential)
+        with timeline.span('bootstrap', app.current_controller,
+                           cloud=cloud_with_region):
+            success = await juju.bootstrap(app.current_controller,
+                                           cloud_with_region,
+                                           app.current_model,
+                                           credential=app.current_credential)
         if not success:
+            progress.emit('bootstrap', status='failed',
+                          controller=app.current_controller,
+                          cloud=app.current_cloud)
             log_file = '{}-bootstrap.err'.format(app.current_controller)
             log_file = Path(app.config['spell-dir']) / log_file
             err_log = log_file.read_text('utf8').splitlines()
@@ -70,6 +84,9 @@ class BaseBootstrapController:
         await utils.run_step(step,
                              self.msg_cb,
                              'Juju Post-Bootstrap')
+        progress.emit('bootstrap', status='completed',
+                      controller=app.current_controller,
+                      model=app.current_model)
         events.Bootstrapped.set()
 
     async def pre_bootstrap(self):
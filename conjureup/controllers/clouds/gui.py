@@ -1,6 +1,7 @@
 from conjureup import controllers, juju, utils
 from conjureup.app_config import app
 from conjureup.telemetry import track_event, track_screen
+from conjureup.ui.views.bootstrapwait import BootstrapWaitView
 from conjureup.ui.views.cloud import CloudView
 
 
@@ -30,9 +31,22 @@ class CloudsController:
         "Pick or create a cloud to bootstrap a new controller on"
         track_screen("Cloud Select")
 
-        all_clouds = juju.get_clouds()
-        compatible_clouds = juju.get_compatible_clouds()
-        cloud_types = juju.get_cloud_types_by_name()
+        excerpt = app.config.get(
+            'description',
+            "Where would you like to deploy?")
+        app.ui.set_header(
+            title="Choose a Cloud",
+            excerpt=excerpt
+        )
+        app.ui.set_body(BootstrapWaitView(
+            app=app,
+            message="Loading available clouds. Please wait."))
+        app.loop.create_task(self._render_clouds())
+
+    async def _render_clouds(self):
+        all_clouds = await juju.aget_clouds()
+        compatible_clouds = juju.get_compatible_clouds(clouds=all_clouds)
+        cloud_types = juju.get_cloud_types_by_name(clouds=all_clouds)
         # filter to only public clouds
         public_clouds = sorted(
             name for name, info in all_clouds.items()
@@ -46,18 +60,11 @@ class CloudsController:
             cloud_types[name] != 'localhost' and
             cloud_types[name] in compatible_clouds)
 
-        excerpt = app.config.get(
-            'description',
-            "Where would you like to deploy?")
         view = CloudView(app,
                          public_clouds,
                          custom_clouds,
                          cb=self.finish)
 
-        app.ui.set_header(
-            title="Choose a Cloud",
-            excerpt=excerpt
-        )
         app.ui.set_body(view)
         app.ui.set_footer('Please press [ENTER] on highlighted '
                           'Cloud to proceed.')
@@ -16,8 +16,9 @@ class CloudsController:
         return controllers.use('regions').render()
 
     def render(self):
-        if app.current_cloud not in juju.get_clouds().keys():
-            formatted_clouds = ", ".join(juju.get_clouds().keys())
+        clouds = juju.get_clouds().keys()
+        if app.current_cloud not in clouds:
+            formatted_clouds = ", ".join(clouds)
             utils.error(
                 "Unknown Cloud: {}, please choose "
                 "from one of the following: {}".format(app.current_cloud,
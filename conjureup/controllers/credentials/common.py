@@ -1,10 +1,20 @@
-from conjureup import controllers, juju
+from conjureup import controllers
 from conjureup.app_config import app
 
 
 class BaseCredentialsController:
     def __init__(self):
-        creds = juju.get_credentials().get(app.current_cloud, {})
+        self.default_credential = None
+        self.credentials = []
+        self.was_picker = False
+
+    def set_credentials(self, all_creds):
+        """ Picks out the credentials for the current cloud
+
+        Arguments:
+        all_creds: result of juju.get_credentials()
+        """
+        creds = all_creds.get(app.current_cloud, {})
         creds.pop('default-region', None)
 
         self.default_credential = creds.pop('default-credential', None)
@@ -13,8 +23,6 @@ class BaseCredentialsController:
         if len(self.credentials) == 1:
             self.default_credential = self.credentials[0]
 
-        self.was_picker = False
-
     def finish(self, cred):
         app.current_credential = cred
         if app.current_cloud_type == 'localhost':
@@ -5,6 +5,7 @@ import yaml
 from conjureup import controllers, juju, utils
 from conjureup.app_config import app
 from conjureup.models.provider import load_schema
+from conjureup.ui.views.bootstrapwait import BootstrapWaitView
 from conjureup.ui.views.credentials import (
     CredentialPickerView,
     NewCredentialView
@@ -17,8 +18,15 @@ class CredentialsController(common.BaseCredentialsController):
     def render(self):
         if app.current_cloud_type == 'localhost':
             # no credentials required for localhost
-            self.finish(None)
-        elif not self.credentials:
+            return self.finish(None)
+        app.ui.set_body(BootstrapWaitView(
+            app=app,
+            message="Loading credentials. Please wait."))
+        app.loop.create_task(self._load_and_render())
+
+    async def _load_and_render(self):
+        self.set_credentials(await juju.aget_credentials())
+        if not self.credentials:
             self.render_form()
         elif len(self.credentials) >= 1:
             self.render_picker()
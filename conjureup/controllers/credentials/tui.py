@@ -1,4 +1,4 @@
-from conjureup import events, utils
+from conjureup import events, juju, utils
 from conjureup.app_config import app
 
 from . import common
@@ -8,8 +8,9 @@ class CredentialsController(common.BaseCredentialsController):
     def render(self):
         if app.current_cloud_type == 'localhost':
             # no credentials required for localhost
-            self.finish(None)
-        elif not self.credentials:
+            return self.finish(None)
+        self.set_credentials(juju.get_credentials())
+        if not self.credentials:
             utils.warning("You attempted to do an install against a cloud "
                           "that requires credentials that could not be "
                           "found.  If you wish to supply those "
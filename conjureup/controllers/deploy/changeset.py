@@ -0,0 +1,192 @@
+""" Change set deploy engine
+
+Alternative to scheduling each application's deploy_service and
+add_relation calls separately: the changes for the whole bundle
+(add-charm, deploy, expose, add-relation) are planned up front along with
+what each one requires, then executed in waves.  Each wave runs every
+change whose requirements are complete, with charms added once per unique
+charm and all of the wave's applications submitted in a single Deploy
+call.
+
+Machines are expected to have been added, and placement directives remapped
+to real machine IDs, before the change set is planned.
+"""
+import asyncio
+from collections import OrderedDict
+
+import yaml
+from juju import constraints as juju_constraints
+from juju.client import client
+from juju.placement import parse as parse_placement
+
+from conjureup import events, juju, timeline
+from conjureup.app_config import app
+
+
+class Change:
+    """ A single step in the change set
+    """
+
+    def __init__(self, change_id, method, requires=None, **args):
+        self.id = change_id
+        self.method = method
+        self.requires = set(requires or [])
+        self.args = args
+
+    def __repr__(self):
+        return "<Change {} requires: {}>".format(self.id,
+                                                 sorted(self.requires))
+
+
+def plan(applications):
+    """ Computes the change set for deploying the given applications
+
+    Arguments:
+    applications: list of bundle services
+
+    Returns:
+    OrderedDict of change IDs to Change
+    """
+    changes = OrderedDict()
+    for service in applications:
+        charm = service.csid.as_str()
+        charm_change = 'addCharm-{}'.format(charm)
+        if charm_change not in changes:
+            changes[charm_change] = Change(charm_change, 'addCharm',
+                                           services=[])
+        changes[charm_change].args['services'].append(service)
+
+        deploy_change = 'deploy-{}'.format(service.service_name)
+        changes[deploy_change] = Change(deploy_change, 'deploy',
+                                        requires=[charm_change],
+                                        service=service)
+
+        if service.expose:
+            expose_change = 'expose-{}'.format(service.service_name)
+            changes[expose_change] = Change(expose_change, 'expose',
+                                            requires=[deploy_change],
+                                            service=service)
+
+    for service in applications:
+        for a, b in service.relations:
+            rel_pair = tuple(sorted((a, b)))
+            rel_change = 'addRelation-{}-{}'.format(*rel_pair)
+            if rel_change in changes:
+                continue
+            requires = {'deploy-{}'.format(ep.split(':')[0])
+                        for ep in rel_pair}
+            changes[rel_change] = Change(rel_change, 'addRelation',
+                                         requires=requires,
+                                         endpoints=rel_pair)
+    return changes
+
+
+async def execute(changes, default_series, msg_cb):
+    """ Executes a change set with as much parallelism as its
+    requirements allow
+
+    Arguments:
+    changes: change set from plan()
+    default_series: series to use for charms which don't specify one
+    msg_cb: message callback
+    """
+    pending = OrderedDict(changes)
+    done = set()
+    while pending:
+        ready = [change for change in pending.values()
+                 if change.requires <= done]
+        if not ready:
+            raise Exception("Unable to resolve change set, blocked: "
+                            "{}".format(list(pending.values())))
+        app.log.debug('Executing change set wave: {}'.format(
+            [change.id for change in ready]))
+
+        tasks = []
+        deploys = [c for c in ready if c.method == 'deploy']
+        if deploys:
+            tasks.append(_deploy([c.args['service'] for c in deploys],
+                                 default_series, msg_cb))
+        for change in ready:
+            if change.method == 'addCharm':
+                tasks.append(_add_charm(change.args['services']))
+            elif change.method == 'expose':
+                tasks.append(_expose(change.args['service'], msg_cb))
+            elif change.method == 'addRelation':
+                tasks.append(juju.add_relation(change.args['endpoints'],
+                                               msg_cb))
+        await asyncio.gather(*tasks)
+
+        for change in ready:
+            done.add(change.id)
+            del pending[change.id]
+
+
+async def deploy(applications, default_series, msg_cb):
+    """ Deploys the applications using the change set engine
+
+    Arguments:
+    applications: list of bundle services
+    default_series: series to use for charms which don't specify one
+    msg_cb: message callback
+    """
+    changes = plan(applications)
+    app.log.info('Deploying {} applications in {} changes'.format(
+        len(applications), len(changes)))
+    await execute(changes, default_series, msg_cb)
+
+
+async def _add_charm(services):
+    for service in services:
+        await juju.resolve_charm(service)
+    charm_url = services[0].csid.as_str()
+    facade = client.ClientFacade.from_connection(app.juju.client.connection)
+    with timeline.span('charm', charm_url):
+        await facade.AddCharm(channel=None, url=charm_url)
+
+
+async def _deploy(services, default_series, msg_cb):
+    msg = 'Deploying {}...'.format(
+        ', '.join(service.service_name for service in services))
+    app.log.info(msg)
+    msg_cb(msg)
+
+    params = []
+    for service in services:
+        charm_url = service.csid.as_str()
+        resources = await app.juju.client._add_store_resources(
+            service.service_name, charm_url)
+        params.append(client.ApplicationDeploy(
+            charm_url=charm_url,
+            application=service.service_name,
+            series=service.csid.series or default_series,
+            config_yaml=yaml.dump({service.service_name: service.options},
+                                  default_flow_style=False),
+            constraints=juju_constraints.parse(service.constraints),
+            num_units=service.num_units,
+            placement=parse_placement(service.placement_spec),
+            resources=resources))
+
+    facade = client.ApplicationFacade.from_connection(
+        app.juju.client.connection)
+    with timeline.span('deploy', ', '.join(
+            service.service_name for service in services)):
+        result = await facade.Deploy(params)
+    errors = [r.error.message for r in result.results if r.error]
+    if errors:
+        raise Exception("Unable to deploy: {}".format('\n'.join(errors)))
+
+    for service in services:
+        msg = '{}: deployed, installing.'.format(service.service_name)
+        app.log.info(msg)
+        msg_cb(msg)
+        events.AppDeployed.set(service.service_name)
+
+
+async def _expose(service, msg_cb):
+    msg = 'Exposing {}.'.format(service.service_name)
+    app.log.info(msg)
+    msg_cb(msg)
+    facade = client.ApplicationFacade.from_connection(
+        app.juju.client.connection)
+    with timeline.span('expose', service.service_name):
+        await facade.Expose(service.service_name)
@@ -1,49 +1,122 @@
-import asyncio
+from functools import partial
 from operator import attrgetter
 
-from conjureup import events, juju, utils
+from conjureup import events, juju, timeline, utils
 from conjureup.app_config import app
 from conjureup.models.step import StepModel
 
+from . import changeset, settle
+from .scheduler import Scheduler
+
+# maximum number of deploy operations (adding machines, deploying,
+# exposing or relating applications) submitted to the controller at once
+DEPLOY_CONCURRENCY = 10
+
+
+def _remap_placement(service, machine_map):
+    """ Remaps machine references in a service's placement to the actual
+    deployed machine IDs (they will only ever not already match if
+    deploying to an existing model that has other machines)
+    """
+    new_placements = []
+    for plabel in service.placement_spec:
+        if ':' in plabel:
+            ptype, pid = plabel.split(':')
+            new_placements.append(':'.join([ptype, machine_map[pid]]))
+        else:
+            new_placements.append(machine_map[plabel])
+    service.placement_spec = new_placements
+
 
 async def do_deploy(msg_cb):
     await events.ModelConnected.wait()
-    cloud_types = juju.get_cloud_types_by_name()
+    timeline.watch_model(app.juju.client)
+    cloud_types = juju.get_cloud_types_by_name(await juju.aget_clouds())
     default_series = app.metadata_controller.series
     machines = app.metadata_controller.bundle.machines
     applications = sorted(app.metadata_controller.bundle.services,
                           key=attrgetter('service_name'))
 
     await pre_deploy(msg_cb=msg_cb)
-    machine_map = await juju.add_machines(applications,
-                                          machines,
-                                          msg_cb=msg_cb)
-    tasks = []
-    for service in applications:
-        if cloud_types[app.current_cloud] == "localhost":
-            # ignore placement when deploying to localhost
+    if cloud_types[app.current_cloud] == "localhost":
+        # ignore placement when deploying to localhost
+        for service in applications:
             service.placement_spec = None
-        elif service.placement_spec:
-            # remap machine references to actual deployed machine IDs
-            # (they will only ever not already match if deploying to
-            # an existing model that has other machines)
-            new_placements = []
-            for plabel in service.placement_spec:
-                if ':' in plabel:
-                    ptype, pid = plabel.split(':')
-                    new_placements.append(':'.join([ptype, machine_map[pid]]))
-                else:
-                    new_placements.append(machine_map[plabel])
-            service.placement_spec = new_placements
-
-        tasks.append(juju.deploy_service(service, default_series,
-                                         msg_cb=msg_cb))
-        tasks.append(juju.set_relations(service,
-                                        msg_cb=msg_cb))
-    await asyncio.gather(*tasks)
+
+    if app.argv.deploy_engine == 'changeset':
+        machine_map = await juju.add_machines(applications,
+                                              machines,
+                                              msg_cb=msg_cb)
+        for service in applications:
+            if service.placement_spec:
+                _remap_placement(service, machine_map)
+        await changeset.deploy(applications, default_series, msg_cb=msg_cb)
+    else:
+        await schedule_deploy(applications, machines, default_series,
+                              msg_cb=msg_cb)
     events.DeploymentComplete.set()
 
 
+async def schedule_deploy(applications, machines, default_series, msg_cb):
+    """ Deploys the applications through the deploy scheduler
+
+    Machines are added first, applications without placement are deployed
+    without waiting for them, and each expose and relation runs as soon as
+    the applications it needs are deployed.
+
+    Arguments:
+    applications: list of bundle services
+    machines: bundle machines, see juju.add_machines
+    default_series: series to use for charms which don't specify one
+    msg_cb: message callback
+    """
+    scheduler = Scheduler(DEPLOY_CONCURRENCY)
+    machine_map = {}
+
+    async def add_machines():
+        machine_map.update(await juju.add_machines(applications,
+                                                   machines,
+                                                   msg_cb=msg_cb))
+
+    async def deploy(service):
+        if service.placement_spec:
+            _remap_placement(service, machine_map)
+        await juju.deploy_service(service, default_series, msg_cb=msg_cb)
+
+    scheduler.add('machines', add_machines, weight=3)
+    for service in applications:
+        deploy_node = 'deploy {}'.format(service.service_name)
+        scheduler.add(deploy_node, partial(deploy, service),
+                      requires=['machines'] if service.placement_spec else [],
+                      weight=2)
+        if service.expose:
+            scheduler.add('expose {}'.format(service.service_name),
+                          partial(juju.expose_service, service,
+                                  msg_cb=msg_cb),
+                          requires=[deploy_node])
+
+    for service in applications:
+        for a, b in service.relations:
+            rel_pair = tuple(sorted((a, b)))
+            rel_node = 'relate {} <-> {}'.format(*rel_pair)
+            if rel_node in scheduler.nodes:
+                continue
+            # relations to applications outside the bundle only wait for
+            # the side being deployed
+            requires = ['deploy {}'.format(ep.split(':')[0])
+                        for ep in rel_pair]
+            scheduler.add(rel_node,
+                          partial(juju.add_relation, rel_pair,
+                                  msg_cb=msg_cb),
+                          requires=[r for r in requires
+                                    if r in scheduler.nodes])
+
+    try:
+        await scheduler.run()
+    finally:
+        app.log.info('Deploy schedule:\n{}'.format(scheduler.report()))
+
+
 async def pre_deploy(msg_cb):
     """ runs pre deploy script if exists
     """
@@ -71,10 +144,15 @@ async def wait_for_applications(msg_cb):
     app.log.info(msg)
     msg_cb(msg)
 
-    step = StepModel({'title': 'Deployment Watcher'},
-                     filename='00_deploy-done',
-                     name='00_deploy-done')
-    await utils.run_step(step, msg_cb)
+    settle_options = app.config['metadata'].get('settle')
+    if settle_options:
+        applications = app.metadata_controller.bundle.services
+        await settle.wait_for_settle(applications, settle_options, msg_cb)
+    else:
+        step = StepModel({'title': 'Deployment Watcher'},
+                         filename='00_deploy-done',
+                         name='00_deploy-done')
+        await utils.run_step(step, msg_cb)
 
     events.ModelSettled.set()
     msg = 'Model settled.'
@@ -1,4 +1,3 @@
-import asyncio
 from operator import attrgetter
 
 from conjureup import controllers, events
@@ -28,16 +27,60 @@ class DeployController:
         app.loop.create_task(self._wait_for_applications())
 
     async def _refresh(self, view):
+        """ Shows every unit once, then pushes only the units which change
+        as deltas arrive from the model's watcher
+        """
         applications = sorted(app.metadata_controller.bundle.services,
                               key=attrgetter('service_name'))
         await events.ModelConnected.wait()
-        while not events.ModelSettled.is_set():
-            if events.Error.is_set():
+        view_data = self._build_view_data(applications)
+        shown = {}
+        for service in view_data.values():
+            shown.update(service['units'])
+        view.refresh_nodes(view_data)
+
+        app_names = {service.service_name for service in applications}
+
+        async def on_unit_change(delta, old_obj, new_obj, model):
+            if events.ModelSettled.is_set() or events.Error.is_set():
                 # deploy or wait_for_apps task failed, so stop refreshing
                 # (the error screen will be shown instead)
                 return
-            view.refresh_nodes(self._build_view_data(applications))
-            await asyncio.sleep(1)
+            if new_obj is None or new_obj.application not in app_names:
+                return
+            unit_data = self._unit_view_data(new_obj)
+            if shown.get(new_obj.name) == unit_data:
+                return
+            shown[new_obj.name] = unit_data
+            view.refresh_nodes({
+                new_obj.application: {'units': {new_obj.name: unit_data}}
+            })
+
+        app.juju.client.add_observer(on_unit_change, entity_type='unit')
+
+    def _unit_view_data(self, unit=None):
+        """ Returns the view data for a unit, or placeholder data for a unit
+        which isn't in the model yet
+        """
+        if unit is None:
+            return {
+                'public-address': '',
+                'machine': '',
+                'agent-status': {'status': '', 'info': ''},
+                'workload-status': {'status': '', 'info': ''},
+            }
+        return {
+            'public-address': unit.public_address,
+            'machine': unit.machine_id,
+            'agent-status': {
+                'status': unit.agent_status,
+                'info': unit.agent_status_message,
+            },
+            'workload-status': {
+                'status': unit.workload_status,
+                'info': unit.workload_status_message,
+            },
+        }
 
     def _build_view_data(self, applications):
         view_data = {}
@@ -51,37 +94,12 @@ class DeployController:
             for unit_num in range(service.num_units):
                 if juju_app and len(juju_app.units) > unit_num:
                     unit = juju_app.units[unit_num]
-                    name = unit.name
-                    public_address = unit.public_address
-                    machine = unit.machine_id
-                    agent_status = unit.agent_status
-                    agent_info = unit.agent_status_message
-                    workload_status = unit.workload_status
-                    workload_info = unit.workload_status_message
+                    units[unit.name] = self._unit_view_data(unit)
                 else:
                     # fill out with placeholder so that the units are
                     # always visible, even if they're not in the model yet
                     name = '{}/{}'.format(service.service_name, unit_num)
-                    public_address = ''
-                    machine = ''
-                    agent_status = ''
-                    agent_info = ''
-                    workload_status = ''
-                    workload_info = ''
-                units.update({
-                    name: {
-                        'public-address': public_address,
-                        'machine': machine,
-                        'agent-status': {
-                            'status': agent_status,
-                            'info': agent_info,
-                        },
-                        'workload-status': {
-                            'status': workload_status,
-                            'info': workload_info,
-                        },
-                    }
-                })
+                    units[name] = self._unit_view_data()
         return view_data
 
     async def _wait_for_applications(self):
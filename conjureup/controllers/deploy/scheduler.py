@@ -0,0 +1,177 @@
+""" Deploy scheduler
+
+Runs deployment work (adding machines, deploying and exposing
+applications, adding relations) as nodes in a dependency graph.  Nodes
+start as soon as everything they require has finished, subject to a global
+concurrency limit, with the nodes on the longest remaining path through the
+graph started first.  Queue and run times are recorded for every node so
+that slow or stalled deployments can be diagnosed from the log.
+"""
+import asyncio
+import heapq
+import time
+
+from conjureup.app_config import app
+
+
+class Node:
+    """ A unit of deployment work in the scheduler's graph
+    """
+
+    def __init__(self, name, func, requires=None, weight=1):
+        """
+        Arguments:
+        name: unique name of the node
+        func: coroutine function to run, called with no arguments
+        requires: names of nodes which must finish before this one starts
+        weight: rough relative cost of the node, used for prioritization
+        """
+        self.name = name
+        self.func = func
+        self.requires = set(requires or [])
+        self.weight = weight
+        self.dependents = set()
+        self.priority = None
+        self.queued_at = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def queue_time(self):
+        if self.queued_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.queued_at
+
+    @property
+    def run_time(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def __repr__(self):
+        return "<Node {} requires: {}>".format(self.name,
+                                               sorted(self.requires))
+
+
+class Scheduler:
+    def __init__(self, concurrency=8, name='deploy'):
+        """
+        Arguments:
+        concurrency: maximum number of nodes to run at once
+        name: what the nodes are, for messages
+        """
+        self.concurrency = concurrency
+        self.name = name
+        self.nodes = {}
+
+    def add(self, name, func, requires=None, weight=1):
+        """ Adds a node to the graph, see Node
+        """
+        if name in self.nodes:
+            raise ValueError("Duplicate {} node: {}".format(self.name, name))
+        node = Node(name, func, requires, weight)
+        self.nodes[name] = node
+        return node
+
+    def _prioritize(self):
+        """ Sets each node's priority to the total weight of the longest
+        path from it to the end of the graph
+        """
+        for node in self.nodes.values():
+            missing = node.requires - self.nodes.keys()
+            if missing:
+                raise ValueError("{} node {} requires unknown "
+                                 "nodes: {}".format(self.name.capitalize(),
+                                                    node.name,
+                                                    sorted(missing)))
+            for name in node.requires:
+                self.nodes[name].dependents.add(node.name)
+
+        def priority(node, visiting=()):
+            if node.name in visiting:
+                raise ValueError("{} graph has a cycle at {}".format(
+                    self.name.capitalize(), node.name))
+            if node.priority is None:
+                node.priority = node.weight + max(
+                    [priority(self.nodes[name], visiting + (node.name,))
+                     for name in node.dependents] or [0])
+            return node.priority
+
+        for node in self.nodes.values():
+            priority(node)
+
+    async def run(self):
+        """ Runs every node, respecting requirements and the concurrency
+        limit
+
+        If a node fails, any other running nodes are cancelled and the
+        exception is raised.
+        """
+        self._prioritize()
+        ready = []
+        running = {}
+        remaining = {name: set(node.requires)
+                     for name, node in self.nodes.items()}
+
+        def enqueue(node):
+            node.queued_at = time.time()
+            heapq.heappush(ready, (-node.priority, node.name))
+
+        for name, requires in remaining.items():
+            if not requires:
+                enqueue(self.nodes[name])
+
+        while ready or running:
+            while ready and len(running) < self.concurrency:
+                _, name = heapq.heappop(ready)
+                node = self.nodes[name]
+                node.started_at = time.time()
+                app.log.debug('Starting {} node {} (queued '
+                              '{:.2f}s)'.format(self.name, name,
+                                                node.queue_time))
+                running[asyncio.ensure_future(node.func())] = node
+
+            if not running:
+                blocked = [n for n in self.nodes.values()
+                           if n.finished_at is None]
+                raise Exception("{} graph stalled, blocked: {}".format(
+                    self.name.capitalize(), blocked))
+
+            done, _ = await asyncio.wait(running.keys(),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node = running.pop(task)
+                node.finished_at = time.time()
+                if task.exception() is not None:
+                    app.log.error('{} node {} failed, still running: '
+                                  '{}'.format(self.name.capitalize(),
+                                              node.name,
+                                              list(running.values())))
+                    for other in running:
+                        other.cancel()
+                    raise task.exception()
+                app.log.debug('Finished {} node {} ({:.2f}s)'.format(
+                    self.name, node.name, node.run_time))
+                for name in node.dependents:
+                    remaining[name].discard(node.name)
+                    if not remaining[name]:
+                        enqueue(self.nodes[name])
+
+    def report(self):
+        """ Returns a summary of queue and run times per node, in the order
+        the nodes were started
+        """
+        nodes = sorted((n for n in self.nodes.values()
+                        if n.started_at is not None),
+                       key=lambda n: n.started_at)
+        start = min([n.queued_at for n in nodes] or [0])
+        lines = ['{:<50} {:>8} {:>8} {:>8}'.format('node', 'start',
+                                                   'queued', 'ran')]
+        for node in nodes:
+            lines.append('{:<50} {:>8.2f} {:>8.2f} {:>8}'.format(
+                node.name,
+                node.started_at - start,
+                node.queue_time,
+                '{:.2f}'.format(node.run_time)
+                if node.run_time is not None else '-'))
+        return '\n'.join(lines)
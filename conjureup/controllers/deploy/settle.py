@@ -0,0 +1,163 @@
+""" Model settle detector
+
+Native alternative to a spell's 00_deploy-done step, which typically polls
+juju status until every unit is idle.  Spells opt in with a settle section
+in their metadata.yaml:
+
+    settle:
+      quiet-period: 30   # seconds with no changes before settled
+      hook-retries: 3    # times a unit may enter error before failing
+      allow-blocked: false
+
+The detector watches the connected model's delta stream and checks the
+applications' units whenever something changes.  Units which stay blocked
+(unless allowed) or in error for the quiet period fail the deployment.
+"""
+import asyncio
+from collections import Counter
+
+from conjureup.app_config import app
+
+QUIET_PERIOD = 30
+HOOK_RETRIES = 3
+
+# workload states which mean the unit is still working towards settling
+PENDING_WORKLOAD_STATES = ['maintenance', 'waiting']
+
+
+class SettleDetector:
+    def __init__(self, model, applications, quiet_period=QUIET_PERIOD,
+                 hook_retries=HOOK_RETRIES, allow_blocked=False):
+        """
+        Arguments:
+        model: connected libjuju model
+        applications: bundle services which must settle
+        quiet_period: seconds the model must be settled with no changes
+        hook_retries: times a unit may enter an error state (which juju
+        retries automatically) before the deployment is failed
+        allow_blocked: whether blocked units count as settled
+        """
+        self.model = model
+        self.applications = applications
+        self.quiet_period = quiet_period
+        self.hook_retries = hook_retries
+        self.allow_blocked = allow_blocked
+        self.changed = asyncio.Event()
+        self.error_counts = Counter()
+        self.in_error = set()
+        self.done = False
+
+    async def on_change(self, delta, old_obj, new_obj, model):
+        if not self.done:
+            self.changed.set()
+
+    def check(self):
+        """ Checks the model's units and machines
+
+        Returns:
+        list of (application, unit, status) for the units which have not
+        settled, with unit None for applications missing units
+
+        Raises an exception if a machine failed to provision or a unit
+        has exhausted its hook retries.
+        """
+        for machine in self.model.machines.values():
+            agent_status = machine.safe_data.get('agent-status', {})
+            if agent_status.get('current') == 'error':
+                raise Exception("Machine {} failed: {}".format(
+                    machine.id, agent_status.get('message', '')))
+
+        waiting = []
+        for service in self.applications:
+            name = service.service_name
+            juju_app = self.model.applications.get(name)
+            units = juju_app.units if juju_app else []
+            if len(units) < service.num_units:
+                waiting.append((name, None, '{}/{} units'.format(
+                    len(units), service.num_units)))
+            for unit in units:
+                status = self._unit_status(unit)
+                if status is not None:
+                    waiting.append((name, unit.name, status))
+        return waiting
+
+    def _unit_status(self, unit):
+        """ Returns the reason a unit hasn't settled, or None
+        """
+        if 'error' in (unit.agent_status, unit.workload_status):
+            if unit.name not in self.in_error:
+                self.in_error.add(unit.name)
+                self.error_counts[unit.name] += 1
+                app.log.warning('Unit {} in error ({} of {} retries): '
+                                '{}'.format(unit.name,
+                                            self.error_counts[unit.name],
+                                            self.hook_retries,
+                                            unit.workload_status_message))
+            if self.error_counts[unit.name] > self.hook_retries:
+                raise Exception("Unit {} failed: {}".format(
+                    unit.name, unit.workload_status_message))
+            return 'error'
+        self.in_error.discard(unit.name)
+
+        if unit.agent_status != 'idle':
+            return unit.agent_status
+        if unit.workload_status in PENDING_WORKLOAD_STATES:
+            return unit.workload_status
+        if unit.workload_status == 'blocked' and not self.allow_blocked:
+            return 'blocked'
+        return None
+
+    async def wait(self, msg_cb):
+        """ Waits until the model has settled for the quiet period
+
+        Arguments:
+        msg_cb: message callback
+        """
+        self.model.add_observer(self.on_change)
+        last_waiting = None
+        try:
+            while True:
+                self.changed.clear()
+                waiting = self.check()
+                if waiting and waiting != last_waiting:
+                    app.log.debug('Waiting for {}'.format(waiting))
+                    msg_cb('Waiting for {} to settle.'.format(
+                        ', '.join(sorted({w[0] for w in waiting}))))
+                last_waiting = waiting
+
+                # units left blocked or in error with nothing else going
+                # on for the quiet period are not going to recover
+                stuck = waiting and all(w[2] in ['blocked', 'error']
+                                        for w in waiting)
+                if waiting and not stuck:
+                    await self.changed.wait()
+                    continue
+                try:
+                    await asyncio.wait_for(self.changed.wait(),
+                                           self.quiet_period)
+                except asyncio.TimeoutError:
+                    if stuck:
+                        raise Exception("Units failed to settle: {}".format(
+                            ', '.join('{} ({})'.format(w[1], w[2])
+                                      for w in waiting)))
+                    return
+        finally:
+            self.done = True
+
+
+async def wait_for_settle(applications, options, msg_cb):
+    """ Waits for the applications in the connected model to settle
+
+    Arguments:
+    applications: bundle services which must settle
+    options: the spell's settle metadata, see module docstring
+    msg_cb: message callback
+    """
+    if not isinstance(options, dict):
+        options = {}
+    detector = SettleDetector(
+        app.juju.client, applications,
+        quiet_period=options.get('quiet-period', QUIET_PERIOD),
+        hook_retries=options.get('hook-retries', HOOK_RETRIES),
+        allow_blocked=options.get('allow-blocked', False))
+    await detector.wait(msg_cb)
@@ -1,4 +1,4 @@
-from conjureup import controllers, utils
+from conjureup import controllers, events, progress, utils
 from conjureup.app_config import app
 
 from . import common
@@ -6,11 +6,21 @@ from . import common
 
 class DeployController:
     def render(self):
+        progress.emit('deploy', status='started')
         app.loop.create_task(common.do_deploy(utils.info))
+        if progress.enabled():
+            app.loop.create_task(self._watch_units())
         app.loop.create_task(self._wait_for_applications())
 
+    async def _watch_units(self):
+        await events.ModelConnected.wait()
+        progress.watch_model(app.juju.client)
+        await events.DeploymentComplete.wait()
+        progress.emit('deploy', status='deployed')
+
     async def _wait_for_applications(self):
         await common.wait_for_applications(utils.info)
+        progress.emit('deploy', status='settled')
         return controllers.use('runsteps').render()
 
 
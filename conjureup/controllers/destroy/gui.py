@@ -1,6 +1,9 @@
+import asyncio
+
 from conjureup import controllers, juju
 from conjureup.app_config import app
 from conjureup.telemetry import track_screen
+from conjureup.ui.views.bootstrapwait import BootstrapWaitView
 from conjureup.ui.views.destroy import DestroyView
 
 
@@ -13,21 +16,27 @@ class Destroy:
         return controllers.use('destroyconfirm').render(controller, model)
 
     def render(self):
-        models_map = {}
-        existing_controllers = juju.get_controllers()['controllers']
-        for cname, d in existing_controllers.items():
-            models_map[cname] = juju.get_models(cname)
-
         track_screen("Destroy Controller")
         excerpt = ("Press [ENTER] on the highlighted item to destroy")
-        view = DestroyView(app,
-                           models=models_map,
-                           cb=self.finish)
-
         app.ui.set_header(
             title="Choose a deployment to teardown",
             excerpt=excerpt
         )
+        app.ui.set_body(BootstrapWaitView(
+            app=app,
+            message="Loading controllers and models. Please wait."))
+        app.loop.create_task(self._render_models())
+
+    async def _render_models(self):
+        existing_controllers = (await juju.aget_controllers())['controllers']
+        cnames = sorted(existing_controllers.keys())
+        models = await asyncio.gather(*[juju.aget_models(cname)
+                                        for cname in cnames])
+        models_map = dict(zip(cnames, models))
+
+        view = DestroyView(app,
+                           models=models_map,
+                           cb=self.finish)
         app.ui.set_body(view)
 
 
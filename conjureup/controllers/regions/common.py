@@ -11,24 +11,55 @@ class BaseRegionsController:
         self._regions = {}
         self._default_regions = {}
 
+    @property
+    def loaded(self):
+        return (app.current_cloud in self._regions and
+                app.current_cloud in self._default_regions)
+
+    async def load(self):
+        """ Populates the regions and default region for the current
+        cloud without blocking the event loop
+        """
+        if app.current_cloud not in self._regions:
+            if app.current_cloud_type in ['maas', 'vsphere', 'localhost']:
+                # No regions for these providers
+                regions = {}
+            else:
+                regions = await juju.aget_regions(app.current_cloud)
+            self._set_regions(regions)
+        if app.current_cloud not in self._default_regions:
+            creds = {}
+            if len(self.regions) != 1:
+                creds = await juju.aget_credentials()
+            self._set_default_region(creds)
+
+    def _set_regions(self, regions):
+        self._regions[app.current_cloud] = sorted(regions.keys())
+
+    def _set_default_region(self, creds):
+        default_region = None
+        if len(self.regions) == 1:
+            default_region = self.regions[0]
+        if not default_region:
+            creds = creds.get(app.current_cloud, {})
+            default_region = creds.get('default-region', None)
+        if not default_region:
+            try:
+                schema = load_schema(app.current_cloud)
+                default_region = schema.default_region
+            except Exception:
+                # if we can't find a schema for this cloud,
+                # just assume no default
+                pass
+        self._default_regions[app.current_cloud] = default_region
+
     @property
     def default_region(self):
         if app.current_cloud not in self._default_regions:
-            default_region = None
-            if len(self.regions) == 1:
-                default_region = self.regions[0]
-            if not default_region:
-                creds = juju.get_credentials().get(app.current_cloud, {})
-                default_region = creds.get('default-region', None)
-            if not default_region:
-                try:
-                    schema = load_schema(app.current_cloud)
-                    default_region = schema.default_region
-                except Exception:
-                    # if we can't find a schema for this cloud,
-                    # just assume no default
-                    pass
-            self._default_regions[app.current_cloud] = default_region
+            creds = {}
+            if len(self.regions) != 1:
+                creds = juju.get_credentials()
+            self._set_default_region(creds)
         return self._default_regions[app.current_cloud]
 
     @property
@@ -36,10 +67,10 @@ class BaseRegionsController:
         if app.current_cloud not in self._regions:
             if app.current_cloud_type in ['maas', 'vsphere', 'localhost']:
                 # No regions for these providers
-                regions = []
+                regions = {}
             else:
-                regions = sorted(juju.get_regions(app.current_cloud).keys())
-            self._regions[app.current_cloud] = regions
+                regions = juju.get_regions(app.current_cloud)
+            self._set_regions(regions)
         return self._regions[app.current_cloud]
 
     def finish(self, region):
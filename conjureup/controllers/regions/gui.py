@@ -1,4 +1,6 @@
 from conjureup import controllers
+from conjureup.app_config import app
+from conjureup.ui.views.bootstrapwait import BootstrapWaitView
 from conjureup.ui.views.regions import RegionPickerView
 
 from . import common
@@ -6,6 +8,18 @@ from . import common
 
 class RegionsController(common.BaseRegionsController):
     def render(self, back=False):
+        if self.loaded:
+            return self._render(back)
+        app.ui.set_body(BootstrapWaitView(
+            app=app,
+            message="Loading available regions. Please wait."))
+        app.loop.create_task(self._load_and_render(back))
+
+    async def _load_and_render(self, back):
+        await self.load()
+        self._render(back)
+
+    def _render(self, back):
         if len(self.regions) < 2:
             if back:
                 return self.back()
@@ -1,7 +1,11 @@
+import hashlib
+import json
+from functools import partial
 from pathlib import Path
 
 from conjureup import utils
 from conjureup.app_config import app
+from conjureup.controllers.deploy.scheduler import Scheduler
 
 
 def set_env(step_model):
@@ -49,8 +53,115 @@ async def do_step(step_model, msg_cb):
 
     # Set environment variables so they can be accessed from the step scripts
     set_env(step_model)
+    step_env = {key.upper(): value
+                for key, value in app.steps_data[step_model.name].items()}
+
+    cache_key = None
+    if step_model.cache:
+        cache_key = step_cache_key(step_model)
+        result = cached_step_result(step_model, cache_key)
+        if result is not None:
+            msg = "Skipping unchanged step: {}.".format(step_model.name)
+            app.log.info(msg)
+            msg_cb(msg)
+            return result
+
+    if step_model.parallel or step_model.after:
+        # this step's output may be interleaved with other steps'
+        label = step_model.title or step_model.name
+
+        def step_msg_cb(msg):
+            msg_cb('{}: {}'.format(label, msg))
+    else:
+        step_msg_cb = msg_cb
+
+    result = await utils.run_step(step_model, step_msg_cb, env=step_env)
+    if cache_key is not None:
+        app.state.set(_step_cache_state_key(step_model), json.dumps({
+            'key': cache_key,
+            'result': result,
+        }))
+    return result
+
+
+def _step_cache_state_key(step_model):
+    return "conjure-up.{}.{}.cache".format(app.config['spell'],
+                                           step_model.name)
+
+
+def step_cache_key(step_model):
+    """ Returns a hash of everything a cacheable step's result depends on:
+    its script, its metadata, its inputs and the model it ran against
+    """
+    digest = hashlib.sha256()
+    for path in [step_model.filename, step_model.filename + '.yaml']:
+        digest.update(Path(path).read_bytes())
+    digest.update(json.dumps(app.steps_data.get(step_model.name, {}),
+                             sort_keys=True, default=str).encode('utf8'))
+    digest.update(app.juju.client.info.uuid.encode('utf8'))
+    return digest.hexdigest()
+
+
+def cached_step_result(step_model, cache_key):
+    """ Returns the stored result of a cacheable step if it last ran with
+    the same cache key, otherwise None
+    """
+    cached = app.state.get(_step_cache_state_key(step_model))
+    if not cached:
+        return None
+    try:
+        cached = json.loads(cached.decode('utf8'))
+    except ValueError:
+        return None
+    if cached.get('key') != cache_key:
+        return None
+    return cached.get('result')
+
+
+def step_requirements(steps):
+    """ Works out which steps each step has to wait for
+
+    A step waits for the steps named in its 'after' metadata, if any.
+    Otherwise a step marked 'parallel' waits for the last preceding step
+    which is neither, so consecutive parallel steps run together, and any
+    other step waits for every step before it.
 
-    return await utils.run_step(step_model, msg_cb)
+    Arguments:
+    steps: StepModels in their listed order
+
+    Returns:
+    list of (step, names of steps it requires)
+    """
+    requirements = []
+    barrier = []
+    previous = []
+    for step in steps:
+        if step.after:
+            requires = list(step.after)
+        elif step.parallel:
+            requires = list(barrier)
+        else:
+            requires = list(previous)
+            barrier = [step.name]
+        requirements.append((step, requires))
+        previous.append(step.name)
+    return requirements
+
+
+async def run_steps(run_step):
+    """ Runs app.steps, concurrently where their metadata allows, with no
+    more than --step-concurrency at once
+
+    Arguments:
+    run_step: coroutine function to run a single step
+    """
+    scheduler = Scheduler(app.argv.step_concurrency, name='step')
+    for step, requires in step_requirements(app.steps):
+        scheduler.add(step.name, partial(run_step, step), requires=requires)
+    try:
+        await scheduler.run()
+    finally:
+        app.log.info('Step schedule:\n{}'.format(scheduler.report()))
 
 
 def save_step_results():
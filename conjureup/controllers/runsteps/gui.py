@@ -1,3 +1,5 @@
+from functools import partial
+
 from conjureup import events
 from conjureup.app_config import app
 from conjureup.ui.views.steps import RunStepsView
@@ -12,13 +14,15 @@ class RunStepsController:
         app.loop.create_task(self.run_steps(view))
 
     async def run_steps(self, view):
-        for step in app.steps:
-            view.mark_step_running(step)
-            step.result = await common.do_step(step, app.ui.set_footer)
-            view.mark_step_complete(step)
+        await common.run_steps(partial(self.run_step, view))
         common.save_step_results()
         events.PostDeployComplete.set()
         view.mark_complete()
 
+    async def run_step(self, view, step):
+        view.mark_step_running(step)
+        step.result = await common.do_step(step, app.ui.set_footer)
+        view.mark_step_complete(step)
+
 
 _controller_class = RunStepsController
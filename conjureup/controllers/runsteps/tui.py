@@ -3,7 +3,7 @@ import sys
 from prettytable import PrettyTable
 from termcolor import colored
 
-from conjureup import events, utils
+from conjureup import events, progress, utils
 from conjureup.app_config import app
 
 from . import common
@@ -15,8 +15,7 @@ class RunStepsController:
 
     async def run_steps(self):
         utils.info("Running post-deployment steps")
-        for step in app.steps:
-            step.result = await common.do_step(step, utils.info)
+        await common.run_steps(self.run_step)
 
         common.save_step_results()
         self.show_summary()
@@ -25,7 +24,25 @@ class RunStepsController:
         events.PostDeployComplete.set()
         events.Shutdown.set(0)
 
+    async def run_step(self, step):
+        progress.emit('step', step=step.name, title=step.title,
+                      status='running')
+        try:
+            step.result = await common.do_step(step, utils.info)
+        except Exception:
+            progress.emit('step', step=step.name, title=step.title,
+                          status='failed')
+            raise
+        progress.emit('step', step=step.name, title=step.title,
+                      status='completed', result=step.result)
+
     def show_summary(self):
+        if progress.enabled():
+            progress.emit('summary', results=[
+                {'step': step.name, 'title': step.title,
+                 'result': step.result}
+                for step in app.steps])
+            return
         utils.info("Post-Deployment Step Results")
         table = PrettyTable()
         table.field_names = ["Application", "Result"]
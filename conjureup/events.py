@@ -7,7 +7,7 @@ from pathlib import Path
 from ubuntui.ev import EventLoop
 from urwid import ExitMainLoop
 
-from conjureup import utils
+from conjureup import progress, status_server, stepmetrics, timeline, utils
 from conjureup.app_config import app
 from conjureup.controllers.lxdsetup.common import (
     LXDInvalidUserError,
@@ -57,10 +57,12 @@ class Event(asyncio.Event):
 
     def set(self):
         self._log('Setting')
+        timeline.record('event', self._name, action='set')
         super().set()
 
     def clear(self):
         self._log('Clearing')
+        timeline.record('event', self._name, action='clear')
         super().clear()
 
     async def wait(self):
@@ -114,8 +116,6 @@ MachinePending = NamedEvent('MachinePending')
 MachineCreated = NamedEvent('MachineCreated')
 AppMachinesCreated = NamedEvent('AppMachinesCreated')
 AppDeployed = NamedEvent('AppDeployed')
-PendingRelations = NamedEvent('PendingRelations')
-RelationsAdded = NamedEvent('RelationsAdded')
 DeploymentComplete = Event('DeploymentComplete')
 ModelSettled = Event('ModelSettled')
 PostDeployComplete = Event('PostDeployComplete')
@@ -186,12 +186,23 @@ async def shutdown_watcher():
 
         # Store application configuration state
         await app.save()
+        timeline.save()
+        stepmetrics.save()
+        if app.headless:
+            stepmetrics.show()
+
+        await status_server.stop()
 
         if app.juju.authenticated:
             app.log.info('Disconnecting model')
             await app.juju.client.disconnect()
             app.log.info('Disconnected')
 
+        if app.juju.controllers:
+            from conjureup import juju  # circular import
+            app.log.info('Disconnecting controllers')
+            await juju.disconnect_controllers()
+
         if not app.headless:
             EventLoop.remove_alarms()
 
@@ -201,7 +212,10 @@ async def shutdown_watcher():
             if coro and coro.cr_code is not shutdown_watcher.__code__:
                 app.log.debug('Cancelling pending task: {}'.format(task))
                 task.cancel()
+        # cancelled steps terminate their processes, wait for them to exit
+        await utils.terminate_steps()
         await asyncio.sleep(0.1)  # give tasks a chance to see the cancel
     except Exception as e:
         app.log.exception('Error in cleanup code: {}'.format(e))
+    progress.flush()
     app.loop.stop()
@@ -1,5 +1,8 @@
+import json
 import os
+import socket
 import time
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import PIPE, CalledProcessError
 
 import yaml
@@ -12,17 +15,107 @@ JUJU_CONTROLLER = os.environ['JUJU_CONTROLLER']
 JUJU_MODEL = os.environ['JUJU_MODEL']
 JUJU_CM_STR = "{}:{}".format(JUJU_CONTROLLER, JUJU_MODEL)
 
+# Set by conjure-up while it serves its model status to steps, see
+# conjureup.status_server
+STATUS_SOCKET = os.environ.get('CONJURE_UP_STATUS_SOCKET')
+STATUS_SOCKET_TIMEOUT = 5
 
-def status():
+# Seconds a status snapshot is reused for by the helpers below
+STATUS_CACHE_TTL = 2
+_status_cache = {}
+
+# Maximum number of juju commands run at once, and seconds between polls,
+# when running actions
+ACTION_CONCURRENCY = 16
+ACTION_POLL_MAX_DELAY = 30
+ACTION_DONE_STATES = ['completed', 'failed', 'cancelled']
+
+
+def status(applications=None, max_age=STATUS_CACHE_TTL):
     """ Get juju status
+
+    Snapshots are shared between callers for up to max_age seconds, and
+    should not be modified.
+
+    Arguments:
+    applications: optional list of application names to limit the status to
+    max_age: seconds a snapshot may be reused for, 0 to always query juju
+
+    Returns:
+    Status dictionary, or None if it couldn't be queried
+    """
+    key = tuple(sorted(applications or []))
+    now = time.time()
+    for cached_key in [key, ()]:
+        # a fresh snapshot of the whole model can answer any query
+        cached = _status_cache.get(cached_key)
+        if cached and now - cached[0] < max_age:
+            if key and not cached_key:
+                return _scope(cached[1], key)
+            return cached[1]
+    data = _query_status_socket('status', key)
+    if data is None:
+        try:
+            sh = run(['juju', 'status', '-m', JUJU_CM_STR,
+                      '--format', 'json'] + list(key),
+                     check=True, stdout=PIPE)
+        except CalledProcessError:
+            return None
+        data = json.loads(sh.stdout.decode())
+    _status_cache[key] = (now, data)
+    return data
+
+
+def _query_status_socket(query, applications=None):
+    """ Asks conjure-up for its view of the model, see
+    conjureup.status_server
+
+    Arguments:
+    query: 'status' or 'leaders'
+    applications: optional list of application names to limit the answer to
+
+    Returns:
+    The answer, or None if conjure-up isn't serving status or the query
+    failed, in which case callers should ask juju instead
     """
+    if not STATUS_SOCKET:
+        return None
+    request = {'query': query, 'applications': list(applications or [])}
     try:
-        sh = run(
-            'juju status -m {} --format yaml'.format(JUJU_CM_STR),
-            shell=True, check=True, stdout=PIPE)
-    except CalledProcessError:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(STATUS_SOCKET_TIMEOUT)
+            sock.connect(STATUS_SOCKET)
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        response = json.loads(data.decode())
+    except (OSError, ValueError) as e:
+        log.debug("Status socket unavailable: {}".format(e))
+        return None
+    if 'error' in response:
+        log.debug("Status socket query failed: {}".format(response['error']))
         return None
-    return yaml.load(sh.stdout.decode())
+    return response
+
+
+def _scope(juju_status, applications):
+    """ Limits a status snapshot to the given applications and the
+    machines hosting them, as juju status does when given application names
+    """
+    apps = {name: app_dict
+            for name, app_dict in juju_status['applications'].items()
+            if name in applications}
+    machine_ids = {unit_dict.get('machine', '').split('/')[0]
+                   for app_dict in apps.values()
+                   for unit_dict in app_dict.get('units', {}).values()}
+    machines = {name: md
+                for name, md in juju_status.get('machines', {}).items()
+                if name in machine_ids}
+    return dict(juju_status, applications=apps, machines=machines)
 
 
 def leader(application):
@@ -31,6 +124,10 @@ def leader(application):
     Arguments:
     application: name of application to query.
     """
+    leaders = _query_status_socket('leaders', [application])
+    if leaders is not None:
+        return leaders.get(application)
+
     try:
         sh = run(
             'juju run -m {} '
@@ -47,13 +144,16 @@ def leader(application):
             return leader['UnitId']
 
 
-def agent_states():
+def agent_states(applications=None):
     """ get a list of running agent states
 
+    Arguments:
+    applications: optional list of application names to limit the states to
+
     Returns:
     A list of tuples of [(unit_name, current_state, workload_message)]
     """
-    juju_status = status()
+    juju_status = status(applications)
     agent_states = []
     for app_name, app_dict in juju_status['applications'].items():
         for unit_name, unit_dict in app_dict.get('units', {}).items():
@@ -65,63 +165,154 @@ def agent_states():
     return agent_states
 
 
-def machine_states():
+def machine_states(applications=None):
     """ get a list of machine states
 
+    Arguments:
+    applications: optional list of application names to limit the states to
+    machines hosting those applications
+
     Returns:
     A list of tuples of [(machine_name, current_state, machine_message)]
     """
     return [(name, md['juju-status'].get('current', ''),
              md['juju-status'].get('message', ''))
-            for name, md in status().get('machines', {}).items()]
+            for name, md in status(applications).get('machines',
+                                                      {}).items()]
+
+
+def _queue_action(unit, action, params):
+    """ Queues an action on a unit
+
+    Returns:
+    The action ID, or None if it couldn't be queued
+    """
+    sh = run(['juju', 'run-action', '-m', JUJU_CM_STR, unit, action] +
+             ['{}={}'.format(k, v) for k, v in sorted(params.items())],
+             stdout=PIPE, stderr=PIPE)
+    try:
+        output = yaml.safe_load(sh.stdout.decode()) or {}
+    except yaml.YAMLError:
+        output = {}
+    log.debug("{}: {}".format(sh.args, output))
+    if not isinstance(output, dict):
+        return None
+    return output.get('Action queued with id', None)
+
+
+def _action_statuses():
+    """ Returns a dictionary of action IDs to their status, for every
+    action in the model
+    """
+    sh = run(['juju', 'show-action-status', '-m', JUJU_CM_STR,
+              '--format', 'yaml'],
+             stdout=PIPE, stderr=PIPE)
+    try:
+        output = yaml.safe_load(sh.stdout.decode()) or {}
+    except yaml.YAMLError as e:
+        log.debug(e)
+        return {}
+    return {a['id']: a['status'] for a in output.get('actions', None) or []}
+
+
+def _action_output(action_id):
+    sh = run(['juju', 'show-action-output', '-m', JUJU_CM_STR,
+              '--format', 'yaml', action_id],
+             stdout=PIPE, stderr=PIPE)
+    try:
+        return yaml.safe_load(sh.stdout.decode()) or {}
+    except yaml.YAMLError as e:
+        log.debug(e)
+        return {}
+
+
+def run_actions(units, action, params=None, timeout=None):
+    """ Runs an action on many units at once and waits for them all
+
+    Every action is queued up front, then the status of all of them is
+    polled with a single query per round, backing off exponentially up
+    to ACTION_POLL_MAX_DELAY seconds between rounds.
+
+    Arguments:
+    units: names of the units to run the action on
+    action: name of the action
+    params: optional dictionary of action parameters
+    timeout: optional seconds to wait for the actions to finish
+
+    Returns:
+    A dictionary of unit names to results, each a dictionary with the
+    action 'id', its 'status' ('completed', 'failed', 'cancelled',
+    'timeout' or 'error' if it couldn't be queued), its 'results',
+    a 'message' and the 'time' in seconds it took.
+    """
+    start = time.time()
+    deadline = start + timeout if timeout is not None else None
+    params = params or {}
+    results = {unit: {'id': None, 'status': 'error', 'results': {},
+                      'message': '', 'time': 0}
+               for unit in units}
+    if not units:
+        return results
+
+    workers = min(ACTION_CONCURRENCY, len(units))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        action_ids = pool.map(
+            lambda unit: _queue_action(unit, action, params), units)
+        pending = {}
+        for unit, action_id in zip(units, action_ids):
+            if action_id:
+                results[unit]['id'] = action_id
+                pending[action_id] = unit
+            else:
+                results[unit]['message'] = 'Could not queue action'
+                results[unit]['time'] = time.time() - start
+
+        delay = 1
+        while pending:
+            statuses = _action_statuses()
+            finished = [action_id for action_id in pending
+                        if statuses.get(action_id) in ACTION_DONE_STATES]
+            finished_at = time.time()
+            outputs = pool.map(_action_output, finished)
+            for action_id, output in zip(finished, outputs):
+                unit = pending.pop(action_id)
+                results[unit].update(
+                    status=output.get('status', statuses[action_id]),
+                    results=output.get('results', {}),
+                    message=output.get('message', ''),
+                    time=finished_at - start)
+            if not pending:
+                break
+            if deadline is not None and time.time() + delay > deadline:
+                for action_id, unit in pending.items():
+                    results[unit].update(
+                        status='timeout',
+                        message='Timed out waiting for action',
+                        time=time.time() - start)
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, ACTION_POLL_MAX_DELAY)
+
+    for unit, result in sorted(results.items()):
+        log.debug("{} {}: {} in {:.1f}s".format(
+            unit, action, result['status'], result['time']))
+    return results
 
 
 def run_action(unit, action):
     """ runs an action on a unit, waits for result
     """
-    is_complete = False
-    sh = run(
-        'juju run-action -m {} {} {}'.format(
-            JUJU_CM_STR, unit, action),
-        shell=True,
-        stdout=PIPE)
-    run_action_output = yaml.load(sh.stdout.decode())
-    log.debug("{}: {}".format(sh.args, run_action_output))
-    action_id = run_action_output.get('Action queued with id', None)
-    log.debug("Found action: {}".format(action_id))
-    if not action_id:
+    result = run_actions([unit], action)[unit]
+    if not result['id']:
         fail("Could not determine action id for test")
-
-    while not is_complete:
-        sh = run(
-            'juju show-action-output -m {} {}'.format(
-                JUJU_CM_STR, action_id),
-            shell=True,
-            stderr=PIPE,
-            stdout=PIPE)
-        log.debug(sh)
-        try:
-            output = yaml.load(sh.stdout.decode())
-            log.debug(output)
-        except Exception as e:
-            log.debug(e)
-        if output['status'] == 'running' or output['status'] == 'pending':
-            time.sleep(5)
-            continue
-        if output['status'] == 'failed':
-            fail("The test failed, "
-                 "please have a look at `juju show-action-status`")
-        if output['status'] == 'completed':
-            completed_msg = "{} test passed".format(unit)
-            results = output.get('results', None)
-            if not results:
-                is_complete = True
-                success(completed_msg)
-            if results.get('outcome', None):
-                is_complete = True
-                completed_msg = "{}: (result) {}".format(
-                    completed_msg,
-                    results.get('outcome'))
-                success(completed_msg)
+    if result['status'] == 'completed':
+        completed_msg = "{} test passed".format(unit)
+        outcome = result['results'].get('outcome', None)
+        if outcome:
+            completed_msg = "{}: (result) {}".format(completed_msg, outcome)
+        success(completed_msg)
+    if result['status'] == 'failed':
+        fail("The test failed, "
+             "please have a look at `juju show-action-status`")
     fail("There is an unknown issue with running the test, "
          "please have a look at `juju show-action-status`")
@@ -1,31 +1,161 @@
 """ Juju helpers
 """
 import asyncio
+import copy
 import json
 import logging
 import os
-from concurrent import futures
+from collections import Counter
+from functools import partial, wraps
 from pathlib import Path
 from subprocess import DEVNULL, PIPE, CalledProcessError
 from tempfile import NamedTemporaryFile
 
 import yaml
 from bundleplacer.charmstore_api import CharmStoreID
+from juju.client import client
+from juju.controller import Controller
+from juju.errors import JujuAPIError
 from juju.model import Model
 
-from conjureup import consts, events, utils
+from conjureup import charm, consts, events, timeline, utils
 from conjureup.app_config import app
-from conjureup.utils import is_linux, juju_path, run, spew
+from conjureup.utils import arun, is_linux, juju_path, run, spew
 
 JUJU_ASYNC_QUEUE = "juju-async-queue"
 
 PENDING_DEPLOYS = 0
 
+# Maximum number of machines requested in a single AddMachines call
+ADD_MACHINES_BATCH_SIZE = 25
+
+# Maximum number of add_relation calls in flight at once, and how many
+# times (with doubling delay, in seconds) one is retried on a transient
+# error
+RELATION_CONCURRENCY = 8
+RELATION_RETRIES = 4
+RELATION_RETRY_DELAY = 1
+_relation_limit = None
+
+# Juju client config files whose modification invalidates any cached
+# query results, see cached_config()
+JUJU_CONFIG_FILES = ['controllers', 'clouds', 'public-clouds',
+                     'credentials', 'accounts', 'models',
+                     'bootstrap-config']
+
+_config_cache = {}
+
+# in-flight query futures, see single_flight()
+_inflight = {}
+
+# number of queries which were served by an identical in-flight query
+# rather than running their own, per query
+single_flight_saved = Counter()
+
 
 class ControllerNotFoundException(Exception):
     "An error when a controller can't be found in juju's config"
 
 
+def _config_fingerprint():
+    """ Returns a tuple of (mtime, size) for each of Juju's client config
+    files, with None for any that do not exist yet
+    """
+    fingerprint = []
+    for name in JUJU_CONFIG_FILES:
+        try:
+            st = os.stat(os.path.join(juju_path(), "{}.yaml".format(name)))
+            fingerprint.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def cached_config(func=None, key=None):
+    """ Caches the result of a Juju client config query until Juju
+    rewrites one of its config files or invalidate_cache() is called.
+
+    Works for both plain functions and coroutines; the async variant of
+    a query can pass the name of its sync counterpart as key so that
+    they share results.
+
+    Results are deep copied on the way out so that callers are free
+    to modify them.
+    """
+    if func is None:
+        return partial(cached_config, key=key)
+    key = key or func.__name__
+
+    def lookup(args, kwargs):
+        cache_key = (key, args, tuple(sorted(kwargs.items())))
+        fingerprint = _config_fingerprint()
+        cached = _config_cache.get(cache_key)
+        if cached is not None and cached[0] == fingerprint:
+            return cache_key, fingerprint, cached
+        return cache_key, fingerprint, None
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key, fingerprint, cached = lookup(args, kwargs)
+            if cached is None:
+                cached = (fingerprint, await func(*args, **kwargs))
+                _config_cache[cache_key] = cached
+            return copy.deepcopy(cached[1])
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key, fingerprint, cached = lookup(args, kwargs)
+            if cached is None:
+                cached = (fingerprint, func(*args, **kwargs))
+                _config_cache[cache_key] = cached
+            return copy.deepcopy(cached[1])
+    wrapper.uncached = func
+    return wrapper
+
+
+def single_flight(func=None, key=None):
+    """ Coalesces concurrent calls to a coroutine with the same arguments
+    so that they share a single subprocess or API call, and its result.
+
+    Calls made after the shared call completes will run the query again;
+    combine with cached_config() to reuse results across time.
+    """
+    if func is None:
+        return partial(single_flight, key=key)
+    key = key or func.__name__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        flight_key = (key, args, tuple(sorted(kwargs.items())))
+        flight = _inflight.get(flight_key)
+        if flight is None:
+            flight = asyncio.ensure_future(func(*args, **kwargs))
+            _inflight[flight_key] = flight
+            flight.add_done_callback(
+                lambda f: _inflight.pop(flight_key, None))
+        else:
+            single_flight_saved[flight_key] += 1
+            app.log.debug('Joining in-flight query {}{} ({} saved)'.format(
+                key, args, single_flight_saved[flight_key]))
+        # shield so that one caller being cancelled doesn't cancel the
+        # query out from under any other callers waiting on it
+        return await asyncio.shield(flight)
+    return wrapper
+
+
+def invalidate_cache():
+    """ Drops all cached Juju client config query results
+
+    This should be called whenever conjure-up changes Juju's state
+    itself (bootstrap, add-model, add-cloud, etc), since the config
+    files may not have been rewritten yet or the mtime may not have
+    changed within the filesystem's timestamp granularity.
+    """
+    _config_cache.clear()
+
+
+@cached_config
 def read_config(name):
     """ Reads a juju config file
 
@@ -76,10 +206,7 @@ def get_controller(id):
     Arguments:
     id: controller id
     """
-    if 'controllers' in get_controllers() \
-       and id in get_controllers()['controllers']:
-        return get_controllers()['controllers'][id]
-    return None
+    return get_controllers().get('controllers', {}).get(id, None)
 
 
 def get_controller_in_cloud(cloud):
@@ -111,6 +238,8 @@ async def login():
         raise Exception("Tried to login with no current model set.")
 
     app.juju.client = Model(app.loop)
+    app.juju.relations = {}
+    app.juju.machines = {}
     model_name = '{}:{}'.format(app.current_controller,
                                 app.current_model)
 
@@ -180,6 +309,7 @@ async def bootstrap(controller, cloud, model='conjure-up', series="xenial",
             app.log.debug('waiting for proc')
             await proc.wait()
             app.log.debug('proc done')
+    invalidate_cache()
     if proc.returncode < 0:
         raise Exception('Bootstrap killed by user: {}'.format(
             proc.returncode))
@@ -221,12 +351,14 @@ async def register_controller(name, endpoint, email, password, twofa,
             stderr = stderr[len(prefix):]
     except asyncio.TimeoutError:
         proc.kill()
+        invalidate_cache()
         app.log.warning('Registration timed out')
         if timeout_cb:
             timeout_cb()
         elif fail_cb:
             fail_cb('Timed out')
         return False
+    invalidate_cache()
     if proc.returncode != 0:
         app.log.warning('Registration failed: {}'.format(stderr))
         if fail_cb:
@@ -238,18 +370,71 @@ async def register_controller(name, endpoint, email, password, twofa,
     return True
 
 
+@single_flight
+async def connect_controller(name):
+    """ Returns an API connection to the named controller
+
+    Connections are pooled in app.juju.controllers and reused for as
+    long as they stay open (libjuju pings the controller to keep them
+    alive); a closed connection is replaced with a fresh one.
+
+    Arguments:
+    name: controller name
+    """
+    controller = app.juju.controllers.get(name)
+    if controller is not None:
+        connection = controller.connection
+        if connection is not None and connection.is_open:
+            return controller
+        app.log.info('Reconnecting to controller {}'.format(name))
+        app.juju.controllers.pop(name, None)
+        try:
+            await controller.disconnect()
+        except Exception:
+            app.log.exception('Error closing controller connection')
+
+    controller = Controller(app.loop)
+    app.log.info('Connecting to controller {}...'.format(name))
+    await controller.connect_controller(name)
+    app.juju.controllers[name] = controller
+    return controller
+
+
+async def disconnect_controllers():
+    """ Closes all pooled controller API connections
+    """
+    controllers = list(app.juju.controllers.values())
+    app.juju.controllers.clear()
+    for controller in controllers:
+        try:
+            await controller.disconnect()
+        except Exception:
+            app.log.exception('Error closing controller connection')
+
+
+async def _list_models(controller):
+    """ Returns a mapping of model name to UUID for the models visible
+    on the named controller, via the API
+
+    Arguments:
+    controller: controller name
+    """
+    controller = await connect_controller(controller)
+    result = await controller.get_models()
+    return {m.model.name: m.model.uuid for m in result.user_models}
+
+
+@single_flight
 async def model_available(name):
-    """ Checks if juju is available
+    """ Checks if a model exists on the current controller
 
     Returns:
-    True/False if juju status was successful and a working model is found
+    True/False if the model is found
+
+    Errors listing the models, such as authentication or connection
+    failures, are raised rather than treated as the model being missing.
     """
-    proc = await asyncio.create_subprocess_exec(
-        'juju', 'status', '-m', ':'.join([app.current_controller, name]),
-        stderr=DEVNULL,
-        stdout=DEVNULL)
-    await proc.wait()
-    return proc.returncode == 0
+    return name in await _list_models(app.current_controller)
 
 
 def autoload_credentials():
@@ -259,6 +444,8 @@ def autoload_credentials():
         run('juju autoload-credentials', shell=True, check=True)
     except CalledProcessError:
         return False
+    finally:
+        invalidate_cache()
     return True
 
 
@@ -285,47 +472,55 @@ def get_credential(cloud, user=None):
             return None
 
 
-def get_credentials(secrets=True):
-    """ List credentials
-
-    This will fallback to reading the credentials file directly
+def _credentials_cmd(secrets):
+    cmd = ['juju', 'list-credentials', '--format', 'yaml']
+    if secrets:
+        cmd.append('--show-secrets')
+    return cmd
 
-    Arguments:
-    secrets: True/False whether to show secrets (ie password)
 
-    Returns:
-    List of credentials
-    """
-    cmd = 'juju list-credentials --format yaml'
-    if secrets:
-        cmd += ' --show-secrets'
-    sh = run(cmd, shell=True, stdout=PIPE, stderr=PIPE)
-    if sh.returncode > 0:
+def _parse_credentials(returncode, stdout, stderr):
+    if returncode > 0:
         try:
             env = read_config('credentials')
             return env['credentials']
         except:
             raise Exception(
-                "Unable to list credentials: {}".format(
-                    sh.stderr.decode('utf8')))
-    env = yaml.safe_load(sh.stdout.decode('utf8'))
+                "Unable to list credentials: {}".format(stderr))
+    env = yaml.safe_load(stdout)
     return env['credentials']
 
 
-def get_regions(cloud):
-    """ List available regions for cloud
+@cached_config
+def get_credentials(secrets=True):
+    """ List credentials
+
+    This will fallback to reading the credentials file directly
 
     Arguments:
-    cloud: Cloud to list regions for
+    secrets: True/False whether to show secrets (ie password)
 
     Returns:
-    Dictionary of all known regions for cloud
+    List of credentials
     """
-    sh = run('juju list-regions {} --format yaml'.format(cloud),
-             shell=True, stdout=PIPE, stderr=PIPE)
-    stdout = sh.stdout.decode('utf8')
-    stderr = sh.stderr.decode('utf8')
-    if sh.returncode > 0:
+    sh = run(_credentials_cmd(secrets), stdout=PIPE, stderr=PIPE)
+    return _parse_credentials(sh.returncode,
+                              sh.stdout.decode('utf8'),
+                              sh.stderr.decode('utf8'))
+
+
+@cached_config(key='get_credentials')
+@single_flight
+async def aget_credentials(secrets=True):
+    """ List credentials without blocking the event loop
+
+    See get_credentials()
+    """
+    return _parse_credentials(*await arun(_credentials_cmd(secrets)))
+
+
+def _parse_regions(returncode, stdout, stderr):
+    if returncode > 0:
         raise Exception("Unable to list regions: {}".format(stderr))
     if 'no regions' in stdout:
         return {}
@@ -338,31 +533,78 @@ def get_regions(cloud):
     return result
 
 
+@cached_config
+def get_regions(cloud):
+    """ List available regions for cloud
+
+    Arguments:
+    cloud: Cloud to list regions for
+
+    Returns:
+    Dictionary of all known regions for cloud
+    """
+    sh = run(['juju', 'list-regions', cloud, '--format', 'yaml'],
+             stdout=PIPE, stderr=PIPE)
+    return _parse_regions(sh.returncode,
+                          sh.stdout.decode('utf8'),
+                          sh.stderr.decode('utf8'))
+
+
+@cached_config(key='get_regions')
+@single_flight
+async def aget_regions(cloud):
+    """ List available regions for cloud without blocking the event loop
+
+    See get_regions()
+    """
+    return _parse_regions(*await arun(
+        ['juju', 'list-regions', cloud, '--format', 'yaml']))
+
+
+def _parse_clouds(returncode, stdout, stderr):
+    if returncode > 0:
+        raise Exception("Unable to list clouds: {}".format(stderr))
+    return yaml.safe_load(stdout)
+
+
+@cached_config
 def get_clouds():
     """ List available clouds
 
     Returns:
     Dictionary of all known clouds including newly created MAAS/Local
     """
-    sh = run('juju list-clouds --format yaml',
-             shell=True, stdout=PIPE, stderr=PIPE)
-    if sh.returncode > 0:
-        raise Exception(
-            "Unable to list clouds: {}".format(sh.stderr.decode('utf8'))
-        )
-    return yaml.safe_load(sh.stdout.decode('utf8'))
+    sh = run(['juju', 'list-clouds', '--format', 'yaml'],
+             stdout=PIPE, stderr=PIPE)
+    return _parse_clouds(sh.returncode,
+                         sh.stdout.decode('utf8'),
+                         sh.stderr.decode('utf8'))
+
 
+@cached_config(key='get_clouds')
+@single_flight
+async def aget_clouds():
+    """ List available clouds without blocking the event loop
 
-def get_compatible_clouds(cloud_types=None):
+    See get_clouds()
+    """
+    return _parse_clouds(*await arun(
+        ['juju', 'list-clouds', '--format', 'yaml']))
+
+
+def get_compatible_clouds(cloud_types=None, clouds=None):
     """ List cloud types compatible with the current spell and controller.
 
     Arguments:
-    clouds: optional initial list of clouds to filter
+    cloud_types: optional initial list of cloud types to filter
+    clouds: optional result of get_clouds() to take cloud types from
     Returns:
     List of cloud types
     """
-    clouds = get_clouds()
-    cloud_types = set(cloud_types or (c['type'] for c in clouds.values()))
+    if not cloud_types:
+        clouds = clouds if clouds is not None else get_clouds()
+        cloud_types = (c['type'] for c in clouds.values())
+    cloud_types = set(cloud_types)
 
     if 'lxd' in cloud_types:
         # normalize 'lxd' cloud type to localhost; 'lxd' can happen
@@ -391,12 +633,17 @@ def get_compatible_clouds(cloud_types=None):
     return sorted(cloud_types)
 
 
-def get_cloud_types_by_name():
+def get_cloud_types_by_name(clouds=None):
     """ Return a mapping of cloud names to their type.
 
     This accounts for some normalizations that get_clouds() doesn't.
+
+    Arguments:
+    clouds: optional result of get_clouds() to map
     """
-    clouds = {n: c['type'] for n, c in get_clouds().items()}
+    if clouds is None:
+        clouds = get_clouds()
+    clouds = {n: c['type'] for n, c in clouds.items()}
 
     # normalize 'lxd' cloud type to localhost; 'lxd' can happen
     # depending on how the controller was bootstrapped
@@ -436,6 +683,7 @@ def add_cloud(name, config):
         spew(tempf.name, output)
         sh = run('juju add-cloud {} {}'.format(name, tempf.name),
                  shell=True, stdout=PIPE, stderr=PIPE)
+        invalidate_cache()
         if sh.returncode > 0:
             raise Exception(
                 "Unable to add cloud: {}".format(sh.stderr.decode('utf8')))
@@ -449,8 +697,9 @@ def get_cloud(name):
     Returns:
     Dictionary of cloud attributes
     """
-    if name in get_clouds().keys():
-        return get_clouds()[name]
+    clouds = get_clouds()
+    if name in clouds:
+        return clouds[name]
     raise LookupError("Unable to locate cloud: {}".format(name))
 
 
@@ -501,9 +750,39 @@ def deploy(bundle):
         raise e
 
 
+async def _add_machines_batch(machines):
+    """ Requests a batch of machines in a single AddMachines call
+
+    Arguments:
+    machines: list of machine attribute dicts, as for add_machines
+
+    Returns:
+    list of new machine IDs, in the same order
+    """
+    params = []
+    for machine in machines:
+        constraints = constraints_to_dict(machine.get('constraints', ''))
+        constraints = {k.replace('-', '_'): v for k, v in constraints.items()}
+        params.append(client.AddMachineParams(
+            series=machine['series'],
+            constraints=client.Value(**constraints),
+            jobs=['JobHostUnits']))
+    facade = client.ClientFacade.from_connection(app.juju.client.connection)
+    results = await facade.AddMachines(params)
+    errors = [r.error.message for r in results.machines if r.error]
+    if errors:
+        raise Exception("Unable to add machines: {}".format(
+            ', '.join(errors)))
+    return [r.machine for r in results.machines]
+
+
 async def add_machines(applications, machines, msg_cb):
     """Add machines to model
 
+    New machines are requested in batches of up to ADD_MACHINES_BATCH_SIZE
+    per API call, with no more than --machines-in-flight machines requested
+    from the controller at once.
+
     Arguments:
 
     app: name of app to which the machines belong
@@ -520,16 +799,14 @@ async def add_machines(applications, machines, msg_cb):
     tasks = []
     for vmid in sorted(machines.keys()):
         if events.MachineCreated.is_set(vmid):
-            tasks.append(asyncio.sleep(0))  # no-op
+            continue
         elif events.MachinePending.is_set(vmid):
-            tasks.append(events.MachineCreated.wait(vmid))
+            # being added for another application; shared so that a
+            # failure reaches every waiter
+            tasks.append(asyncio.shield(app.juju.machines[vmid]))
         else:
             events.MachinePending.set(vmid)
-            machine = machines[vmid]
-            series = machine['series']
-            constraints = constraints_to_dict(machine.get('constraints', ''))
-            tasks.append(app.juju.client.add_machine(series=series,
-                                                     constraints=constraints))
+            app.juju.machines[vmid] = asyncio.Future()
             new_machines[vmid] = None
 
     if new_machines:
@@ -547,14 +824,37 @@ async def add_machines(applications, machines, msg_cb):
         app.log.info('No new machines to add for {}'.format(
             ', '.join(a.service_name for a in applications)))
 
-    results = await asyncio.gather(*tasks)
-    for vmid, task_result in zip(sorted(machines.keys()), results):
-        if vmid not in new_machines:
-            # this is an events.MachinePending.wait() or no-op result
-            continue
-        events.MachinePending.clear(vmid)
-        events.MachineCreated.set(vmid)
-        new_machines[vmid] = task_result.id
+    max_in_flight = max(1, app.argv.machines_in_flight)
+    batch_size = min(ADD_MACHINES_BATCH_SIZE, max_in_flight)
+    batch_limit = asyncio.Semaphore(max(1, max_in_flight // batch_size))
+
+    async def add_batch(batch):
+        try:
+            async with batch_limit:
+                with timeline.span('machines', ', '.join(batch)):
+                    machine_ids = await _add_machines_batch(
+                        [machines[vmid] for vmid in batch])
+        except BaseException as e:
+            # the machines can be requested again, and anything waiting
+            # for them fails rather than waiting forever
+            for vmid in batch:
+                events.MachinePending.clear(vmid)
+                pending = app.juju.machines.pop(vmid)
+                if isinstance(e, asyncio.CancelledError):
+                    pending.cancel()
+                else:
+                    pending.set_exception(e)
+            raise
+        for vmid, machine_id in zip(batch, machine_ids):
+            events.MachinePending.clear(vmid)
+            events.MachineCreated.set(vmid)
+            app.juju.machines.pop(vmid).set_result(machine_id)
+            new_machines[vmid] = machine_id
+
+    vmids = sorted(new_machines.keys())
+    for i in range(0, len(vmids), batch_size):
+        tasks.append(add_batch(vmids[i:i + batch_size]))
+    await asyncio.gather(*tasks)
 
     if new_machines:
         msg = "Added machine{}: {}".format(
@@ -572,6 +872,30 @@ async def add_machines(applications, machines, msg_cb):
     return new_machines
 
 
+async def resolve_charm(service):
+    """ Pins the service's charm ID to the latest revision in the charm
+    store if it doesn't already have one
+
+    Arguments:
+    service: Service to resolve
+    """
+    if service.csid.rev == "":
+        id_no_rev = service.csid.as_str_without_rev()
+        service.csid = CharmStoreID(await charm.resolve_revision(id_no_rev))
+
+
+def prefetch_charms(services):
+    """ Starts resolving the charm revisions for any services whose charm
+    ID doesn't have one, so they are ready by the time they are deployed
+
+    Arguments:
+    services: bundle services
+    """
+    for service in services:
+        if service.csid.rev == "":
+            charm.resolve_revision(service.csid.as_str_without_rev())
+
+
 async def deploy_service(service, default_series, msg_cb):
     """Juju deploy service.
 
@@ -581,6 +905,9 @@ async def deploy_service(service, default_series, msg_cb):
     If the service's charm ID has a series, use that, otherwise use
     the provided default series.
 
+    Any machines named in the service's placement must already have been
+    added; ordering is handled by the deploy scheduler.
+
     Arguments:
     service: Service to deploy
     msg_cb: message callback
@@ -590,18 +917,7 @@ async def deploy_service(service, default_series, msg_cb):
     submitted to juju
 
     """
-    name = service.service_name
-    if not events.AppMachinesCreated.is_set(name):
-        # block until we have machines
-        await events.AppMachinesCreated.wait(name)
-        app.log.debug('Machines for {} are ready'.format(name))
-
-    if service.csid.rev == "":
-        id_no_rev = service.csid.as_str_without_rev()
-        mc = app.metadata_controller
-        futures.wait([mc.metadata_future])
-        info = mc.get_charm_info(id_no_rev, lambda _: None)
-        service.csid = CharmStoreID(info["Id"])
+    await resolve_charm(service)
 
     deploy_args = {}
     deploy_args = dict(
@@ -619,13 +935,8 @@ async def deploy_service(service, default_series, msg_cb):
     from pprint import pformat
     app.log.debug(pformat(deploy_args))
 
-    app_inst = await app.juju.client.deploy(**deploy_args)
-
-    if service.expose:
-        msg = 'Exposing {}.'.format(service.service_name)
-        app.log.info(msg)
-        msg_cb(msg)
-        await app_inst.expose()
+    with timeline.span('deploy', service.service_name):
+        await app.juju.client.deploy(**deploy_args)
 
     msg = '{}: deployed, installing.'.format(service.service_name)
     app.log.info(msg)
@@ -634,43 +945,76 @@ async def deploy_service(service, default_series, msg_cb):
     events.AppDeployed.set(service.service_name)
 
 
-async def set_relations(service, msg_cb):
-    """ Juju set relations
+async def expose_service(service, msg_cb):
+    """ Juju expose service
 
     Arguments:
-    service: service with relations to set
+    service: deployed service to expose
+    msg_cb: message callback
     """
-    relations = set()
-    for a, b in service.relations:
-        rel_pair = tuple(sorted((a, b)))
-        if rel_pair in relations:
-            continue
-        a_app = a.split(':')[0]
-        b_app = b.split(':')[0]
-        await asyncio.gather(
-            events.AppDeployed.wait(a_app),
-            events.AppDeployed.wait(b_app),
-        )
-        relations.add(rel_pair)
+    msg = 'Exposing {}.'.format(service.service_name)
+    app.log.info(msg)
+    msg_cb(msg)
+    with timeline.span('expose', service.service_name):
+        await app.juju.client.applications[service.service_name].expose()
 
-    for rel_pair in relations:
-        rel_name = '{} <-> {}'.format(*rel_pair)
-        pending = events.PendingRelations.is_set(rel_name)
-        added = events.RelationsAdded.is_set(rel_name)
-        if pending or added:
-            continue
 
-        msg = "Setting relation {}".format(rel_name)
-        app.log.info(msg)
-        msg_cb(msg)
-        events.PendingRelations.set(rel_name)
-        await app.juju.client.add_relation(*rel_pair)
-        events.PendingRelations.clear(rel_name)
-        events.RelationsAdded.set(rel_name)
+async def add_relation(rel_pair, msg_cb):
+    """ Juju add relation
 
-    events.RelationsAdded.set(service.service_name)
+    Each relation is added once per model no matter how many callers ask
+    for it; callers asking for a relation already being added wait for
+    that attempt to finish.
+
+    Arguments:
+    rel_pair: the two endpoints to relate
+    msg_cb: message callback
+    """
+    rel_pair = tuple(sorted(rel_pair))
+    relations = app.juju.relations
+    if rel_pair not in relations:
+        relations[rel_pair] = asyncio.ensure_future(
+            _add_relation(rel_pair, msg_cb))
+
+        def forget_failed(future):
+            if future.cancelled() or future.exception() is not None:
+                relations.pop(rel_pair, None)
+
+        relations[rel_pair].add_done_callback(forget_failed)
+    await asyncio.shield(relations[rel_pair])
 
 
+async def _add_relation(rel_pair, msg_cb):
+    global _relation_limit
+    if _relation_limit is None:
+        _relation_limit = asyncio.Semaphore(RELATION_CONCURRENCY)
+
+    rel_name = '{} <-> {}'.format(*rel_pair)
+    msg = "Setting relation {}".format(rel_name)
+    app.log.info(msg)
+    msg_cb(msg)
+    delay = RELATION_RETRY_DELAY
+    for attempt in range(RELATION_RETRIES + 1):
+        try:
+            async with _relation_limit:
+                with timeline.span('relation', rel_name, attempt=attempt):
+                    await app.juju.client.add_relation(*rel_pair)
+            return
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            if attempt == RELATION_RETRIES:
+                raise
+            app.log.warning('Failed to set relation {} ({}), retrying in '
+                            '{}s'.format(rel_name, e, delay))
+            await asyncio.sleep(delay)
+            delay *= 2
+        except JujuAPIError as e:
+            if 'already exists' not in str(e):
+                raise
+            app.log.debug('Relation {} already exists'.format(rel_name))
+            return
+
+
+@cached_config
 def get_controller_info(name=None):
     """ Returns information on current controller
 
@@ -693,19 +1037,36 @@ def get_controller_info(name=None):
     return next(iter(data.values()))
 
 
+def _parse_controllers(returncode, stdout, stderr):
+    if returncode > 0:
+        raise LookupError(
+            "Unable to list controllers: {}".format(stderr))
+    return yaml.safe_load(stdout)
+
+
+@cached_config
 def get_controllers():
     """ List available controllers
 
     Returns:
     List of known controllers
     """
-    sh = run('juju list-controllers --format yaml',
-             shell=True, stdout=PIPE, stderr=PIPE)
-    if sh.returncode > 0:
-        raise LookupError(
-            "Unable to list controllers: {}".format(sh.stderr.decode('utf8')))
-    env = yaml.safe_load(sh.stdout.decode('utf8'))
-    return env
+    sh = run(['juju', 'list-controllers', '--format', 'yaml'],
+             stdout=PIPE, stderr=PIPE)
+    return _parse_controllers(sh.returncode,
+                              sh.stdout.decode('utf8'),
+                              sh.stderr.decode('utf8'))
+
+
+@cached_config(key='get_controllers')
+@single_flight
+async def aget_controllers():
+    """ List available controllers without blocking the event loop
+
+    See get_controllers()
+    """
+    return _parse_controllers(*await arun(
+        ['juju', 'list-controllers', '--format', 'yaml']))
 
 
 def get_account(controller):
@@ -722,6 +1083,7 @@ def get_account(controller):
     return get_accounts().get(controller, {})
 
 
+@cached_config
 def get_accounts():
     """ List available accounts
 
@@ -769,19 +1131,28 @@ async def add_model(name, controller, cloud, credential=None):
         await login()
         return
 
+    # the CLI registers the model in its client config (models.yaml and
+    # the account macaroons) and uploads the credential, which creating
+    # the model over the API does not, so that steps can use it too
     cmd = ['juju', 'add-model', name, cloud, '--controller', controller]
     if credential:
         cmd.extend(['--credential', credential])
-    proc = await asyncio.create_subprocess_exec(*cmd,
-                                                stdout=DEVNULL, stderr=PIPE)
-    _, stderr = await proc.communicate()
+    try:
+        proc = await asyncio.create_subprocess_exec(*cmd,
+                                                    stdout=DEVNULL,
+                                                    stderr=PIPE)
+        _, stderr = await proc.communicate()
+    finally:
+        invalidate_cache()
     if proc.returncode > 0:
         raise Exception(
             "Unable to create model: {}".format(stderr.decode('utf8')))
     # the CLI has to connect to the model at least once to
-    # populate the model macaroons; model_available does this
-    # and verifies the model is working
-    if not await model_available(name):
+    # populate the model macaroons
+    proc = await asyncio.create_subprocess_exec(
+        'juju', 'status', '-m', ':'.join([controller, name]),
+        stdout=DEVNULL, stderr=DEVNULL)
+    if await proc.wait() > 0:
         raise Exception("Unable to connect model after creation")
     events.ModelAvailable.set()
     await login()
@@ -794,16 +1165,29 @@ async def destroy_model(controller, model):
     controller: name of controller
     model: name of model to destroy
     """
-    proc = await asyncio.create_subprocess_exec(
-        'juju', 'destroy-model', '-y', ':'.join([controller, model]),
-        stdout=DEVNULL, stderr=PIPE)
-    _, stderr = await proc.communicate()
+    # through the CLI, so that the model is also removed from its client
+    # config
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            'juju', 'destroy-model', '-y', ':'.join([controller, model]),
+            stdout=DEVNULL, stderr=PIPE)
+        _, stderr = await proc.communicate()
+    finally:
+        invalidate_cache()
     if proc.returncode > 0:
         raise Exception(
             "Unable to destroy model: {}".format(stderr.decode('utf8')))
     events.ModelAvailable.clear()
 
 
+def _parse_models(returncode, stdout, stderr):
+    if returncode > 0:
+        raise LookupError(
+            "Unable to list models: {}".format(stderr))
+    return yaml.safe_load(stdout)
+
+
+@cached_config
 def get_models(controller):
     """ List available models
 
@@ -813,13 +1197,22 @@ def get_models(controller):
     Returns:
     List of known models
     """
-    sh = run('juju list-models --format yaml -c {}'.format(controller),
-             shell=True, stdout=PIPE, stderr=PIPE)
-    if sh.returncode > 0:
-        raise LookupError(
-            "Unable to list models: {}".format(sh.stderr.decode('utf8')))
-    out = yaml.safe_load(sh.stdout.decode('utf8'))
-    return out
+    sh = run(['juju', 'list-models', '--format', 'yaml', '-c', controller],
+             stdout=PIPE, stderr=PIPE)
+    return _parse_models(sh.returncode,
+                         sh.stdout.decode('utf8'),
+                         sh.stderr.decode('utf8'))
+
+
+@cached_config(key='get_models')
+@single_flight
+async def aget_models(controller):
+    """ List available models without blocking the event loop
+
+    See get_models()
+    """
+    return _parse_models(*await arun(
+        ['juju', 'list-models', '--format', 'yaml', '-c', controller]))
 
 
 def get_current_model():
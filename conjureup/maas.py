@@ -10,9 +10,15 @@ from requests_oauthlib import OAuth1
 
 from conjureup import juju
 from conjureup.app_config import app
-from conjureup.async import submit
+from conjureup.async import LATEST, configure_lane, submit
 from conjureup.units import human_to_gb
 
+MAAS_ASYNC_QUEUE = "maas-async-queue"
+
+# only the latest refresh of each cached key is worth running
+configure_lane(MAAS_ASYNC_QUEUE, concurrency=2, max_queued=20,
+               policy=LATEST, priority=1)
+
 
 class MaasClient:
     API_VERSION = '2.0'
@@ -95,6 +101,8 @@ class MaasClient:
         return r.json()
 
     def _update_cache(self, key, future):
+        if future.cancelled():
+            return
         val = future.result()
         self.CACHE[key] = (val, time.time())
 
@@ -109,7 +117,9 @@ class MaasClient:
         c_val, c_ts = self.CACHE.get(key, (None, now))
         if c_val is None or now - c_ts > 5:
             f = submit(partial(self._get_key_sync, key),
-                       lambda _: None)
+                       lambda _: None,
+                       queue_name=MAAS_ASYNC_QUEUE,
+                       key=key)
             if f:
                 f.add_done_callback(partial(self._update_cache, key))
 
@@ -12,6 +12,16 @@ class StepModel:
         self.viewable = step.get('viewable', False)
         self.needs_sudo = step.get('sudo', False)
         self.additional_input = step.get('additional-input', [])
+        # names of the steps this step must run after, and whether it may
+        # run alongside the steps around it, see runsteps.common
+        after = step.get('after', [])
+        self.after = [after] if isinstance(after, str) else after
+        self.parallel = step.get('parallel', False)
+        # whether the step can be skipped on re-runs when nothing it
+        # depends on has changed
+        self.cache = step.get('cache', False)
+        # seconds the step may run for before it is terminated
+        self.timeout = step.get('timeout')
         self.filename = filename
         self.name = name
 
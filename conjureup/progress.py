@@ -0,0 +1,103 @@
+""" Machine-readable progress for headless mode
+
+With --progress-format=jsonl, headless runs write one JSON object per line
+to stdout for each state change instead of coloured messages, e.g.:
+
+    {"elapsed": 12.3, "phase": "deploy", "app": "mysql",
+     "unit": "mysql/0", "status": "active", "message": "Ready"}
+
+Every event has a 'phase' (bootstrap, deploy, step, summary, metrics or
+log) and the seconds 'elapsed' since conjure-up started.  Output is
+buffered and written at most every FLUSH_INTERVAL seconds, so that runs
+with many concurrent units stay cheap.
+"""
+import json
+import sys
+import time
+
+from conjureup.app_config import app
+
+FLUSH_INTERVAL = 0.5
+MAX_BUFFERED_LINES = 200
+
+_start = time.time()
+
+
+class BufferedWriter:
+    """ Collects lines and writes them out together
+    """
+
+    def __init__(self, stream, interval=FLUSH_INTERVAL,
+                 max_lines=MAX_BUFFERED_LINES):
+        self.stream = stream
+        self.interval = interval
+        self.max_lines = max_lines
+        self.lines = []
+        self.flush_handle = None
+
+    def write(self, line):
+        self.lines.append(line)
+        if len(self.lines) >= self.max_lines or app.loop is None:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = app.loop.call_later(self.interval,
+                                                    self.flush)
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.lines:
+            self.stream.write(''.join(self.lines))
+            self.stream.flush()
+            self.lines = []
+
+
+_writer = BufferedWriter(sys.stdout)
+
+
+def enabled():
+    return app.headless and \
+        getattr(app.argv, 'progress_format', None) == 'jsonl'
+
+
+def emit(phase, **fields):
+    """ Writes a progress event, if enabled
+
+    Arguments:
+    phase: what the event is about, e.g. 'deploy'
+    fields: details of the event, e.g. app, unit, status, message
+    """
+    if not enabled():
+        return
+    event = {'elapsed': round(time.time() - _start, 3), 'phase': phase}
+    event.update((k, v) for k, v in fields.items() if v is not None)
+    _writer.write(json.dumps(event, sort_keys=True) + '\n')
+
+
+def flush():
+    _writer.flush()
+
+
+def watch_model(model):
+    """ Emits an event for every unit status change in the model
+    """
+    states = {}
+
+    async def on_unit_change(delta, old_obj, new_obj, model):
+        if new_obj is None:
+            return
+        state = (new_obj.agent_status, new_obj.workload_status,
+                 new_obj.workload_status_message)
+        if states.get(new_obj.name) == state:
+            return
+        states[new_obj.name] = state
+        emit('deploy',
+             app=new_obj.application,
+             unit=new_obj.name,
+             agent=new_obj.agent_status,
+             status=new_obj.workload_status,
+             message=new_obj.workload_status_message,
+             machine=new_obj.machine_id)
+
+    model.add_observer(on_unit_change, entity_type='unit')
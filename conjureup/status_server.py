@@ -0,0 +1,169 @@
+""" Read-only model status socket for step scripts
+
+While steps run, conjure-up serves the state of its connected model on a
+Unix socket whose path is passed to steps as CONJURE_UP_STATUS_SOCKET, so
+that step scripts (through conjureup.hooklib.juju) can answer status
+queries without forking the juju CLI.
+
+Requests and responses are single lines of JSON.  A request is an object
+with a 'query' of 'status' or 'leaders' and an optional list of
+'applications' to limit the answer to.  'status' answers in the same shape
+as `juju status --format json`; 'leaders' maps applications to their
+leader unit.  Failed queries answer with an 'error' message.
+"""
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+from juju.client import client
+
+from conjureup.app_config import app
+
+_server = None
+_socket_dir = None
+
+
+def _status(status):
+    if not status:
+        return {}
+    return {'current': status.get('current', ''),
+            'message': status.get('message', '')}
+
+
+def snapshot(applications=None):
+    """ Returns the connected model's status
+
+    Arguments:
+    applications: optional list of application names to limit the status
+    to, along with the machines hosting them
+
+    Returns:
+    Status dictionary in the shape of `juju status --format json`
+    """
+    model = app.juju.client
+    apps = {}
+    for name, application in model.applications.items():
+        if applications and name not in applications:
+            continue
+        data = application.safe_data
+        apps[name] = {
+            'charm': data.get('charm-url'),
+            'exposed': data.get('exposed', False),
+            'application-status': _status(data.get('status')),
+            'relations': {},
+            'units': {
+                unit.name: {
+                    'machine': unit.safe_data.get('machine-id', ''),
+                    'public-address': unit.safe_data.get('public-address',
+                                                         ''),
+                    'workload-status': _status(
+                        unit.safe_data.get('workload-status')),
+                    'juju-status': _status(
+                        unit.safe_data.get('agent-status')),
+                } for unit in application.units
+            },
+        }
+
+    for relation in model.relations:
+        endpoints = relation.safe_data.get('endpoints', [])
+        for endpoint in endpoints:
+            name = endpoint['application-name']
+            if name not in apps:
+                continue
+            # peer relations only have the one endpoint
+            remote = [other['application-name'] for other in endpoints
+                      if other is not endpoint] or [name]
+            apps[name]['relations'].setdefault(
+                endpoint['relation']['name'], []).extend(remote)
+
+    hosts = {unit['machine'].split('/')[0]
+             for app_dict in apps.values()
+             for unit in app_dict['units'].values()}
+    machines = {}
+    for machine_id, machine in model.machines.items():
+        if applications and machine_id not in hosts:
+            continue
+        data = machine.safe_data
+        machines[machine_id] = {
+            'instance-id': data.get('instance-id', ''),
+            'series': data.get('series', ''),
+            'juju-status': _status(data.get('agent-status')),
+            'machine-status': _status(data.get('instance-status')),
+        }
+
+    return {
+        'model': {'name': app.current_model,
+                  'controller': app.current_controller},
+        'applications': apps,
+        'machines': machines,
+    }
+
+
+async def leaders(applications=None):
+    """ Returns the leader unit of each application
+
+    Leadership isn't part of the model's watched state, so this makes a
+    single FullStatus API call.
+    """
+    facade = client.ClientFacade.from_connection(app.juju.client.connection)
+    status = await facade.FullStatus(applications)
+    result = {}
+    for name, application in status.applications.items():
+        for unit_name, unit in application.units.items():
+            if unit.leader:
+                result[name] = unit_name
+    return result
+
+
+async def _handle(reader, writer):
+    try:
+        request = json.loads((await reader.readline()).decode() or '{}')
+        query = request.get('query', 'status')
+        applications = request.get('applications') or None
+        if not app.juju.authenticated:
+            response = {'error': 'Model not connected'}
+        elif query == 'status':
+            response = snapshot(applications)
+        elif query == 'leaders':
+            response = await leaders(applications)
+        else:
+            response = {'error': 'Unknown query: {}'.format(query)}
+    except Exception as e:
+        app.log.exception('Status socket query failed')
+        response = {'error': str(e)}
+    writer.write(json.dumps(response).encode() + b'\n')
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start():
+    """ Starts serving status, if the model is connected and it isn't
+    already being served
+    """
+    global _server, _socket_dir
+    if _server is not None or not app.juju.authenticated:
+        return
+    # the socket is only accessible to us, as the directory is private
+    _socket_dir = tempfile.mkdtemp(prefix='conjure-up-')
+    path = os.path.join(_socket_dir, 'status.sock')
+    _server = await asyncio.start_unix_server(_handle, path=path)
+    app.env['CONJURE_UP_STATUS_SOCKET'] = path
+    app.log.debug('Serving model status on {}'.format(path))
+
+
+async def stop():
+    """ Stops serving status
+    """
+    global _server, _socket_dir
+    if _server is None:
+        return
+    _server.close()
+    await _server.wait_closed()
+    shutil.rmtree(_socket_dir, ignore_errors=True)
+    app.env.pop('CONJURE_UP_STATUS_SOCKET', None)
+    _server = None
+    _socket_dir = None
@@ -0,0 +1,148 @@
+""" Step resource metrics
+
+Records what each step run by conjureup.utils.run_step costs: wall time,
+the CPU time and peak memory of the step and everything it ran, how many
+times it ran juju, and how much output it wrote.  The metrics are saved to
+the spell directory on shutdown as step-metrics.json, and shown as a table
+at the end of headless runs, so that spell authors can find slow steps.
+
+Steps are run through this module's main(), which waits for the step with
+wait4() to get its resource usage, and puts a juju wrapper first on the
+step's PATH to count juju commands:
+
+    python3 -m conjureup.stepmetrics <usage file> <step script>
+"""
+import json
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+
+from prettytable import PrettyTable
+
+from conjureup import progress
+from conjureup.app_config import app
+
+_metrics = []
+
+JUJU_WRAPPER = """#!/bin/sh
+echo >> {count_path}
+exec {juju} "$@"
+"""
+
+
+def wrap_command(usage_path, cmd):
+    """ Returns the command to run cmd through main()
+    """
+    return [sys.executable, '-m', 'conjureup.stepmetrics', usage_path] + cmd
+
+
+def read_usage(usage_path):
+    """ Returns the resource usage main() wrote, or an empty dict if the
+    step didn't finish
+    """
+    try:
+        with open(usage_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record(step_name, **metrics):
+    """ Records the metrics of a step run
+    """
+    metrics['step'] = step_name
+    _metrics.append(metrics)
+
+
+def table():
+    """ Returns the recorded metrics as a table, slowest steps first
+    """
+    table = PrettyTable()
+    table.field_names = ['Step', 'Wall (s)', 'User (s)', 'Sys (s)',
+                         'Peak RSS (MB)', 'Juju calls', 'Output (KB)']
+    table.align = 'r'
+    table.align['Step'] = 'l'
+    for metrics in sorted(_metrics, key=lambda m: -m['wall_time']):
+        table.add_row([
+            metrics['step'],
+            '{:.1f}'.format(metrics['wall_time']),
+            '{:.1f}'.format(metrics.get('cpu_user', 0)),
+            '{:.1f}'.format(metrics.get('cpu_sys', 0)),
+            '{:.1f}'.format(metrics.get('max_rss_kb', 0) / 1024),
+            metrics.get('juju_calls', '-'),
+            '{:.1f}'.format(metrics['output_bytes'] / 1024),
+        ])
+    return table.get_string()
+
+
+def show():
+    """ Shows the recorded metrics at the end of a headless run
+    """
+    if not _metrics:
+        return
+    if progress.enabled():
+        progress.emit('metrics', steps=_metrics)
+        return
+    print('Step Metrics')
+    print(table())
+
+
+def save():
+    """ Writes the recorded metrics to the spell directory
+    """
+    spell_dir = app.config.get('spell-dir') if app.config else None
+    if not spell_dir or not _metrics:
+        return
+    with open(os.path.join(spell_dir, 'step-metrics.json'), 'w') as f:
+        json.dump(_metrics, f, indent=2, sort_keys=True)
+    app.log.info('Saved step metrics to {}'.format(spell_dir))
+
+
+def main():
+    usage_path, cmd = sys.argv[1], sys.argv[2:]
+    env = dict(os.environ)
+    wrapper_dir = tempfile.mkdtemp(prefix='conjure-up-')
+    count_path = os.path.join(wrapper_dir, 'juju-calls')
+    juju = shutil.which('juju')
+    if juju:
+        wrapper_path = os.path.join(wrapper_dir, 'juju')
+        with open(wrapper_path, 'w') as f:
+            f.write(JUJU_WRAPPER.format(count_path=shlex.quote(count_path),
+                                        juju=shlex.quote(juju)))
+        os.chmod(wrapper_path, 0o755)
+        env['PATH'] = os.pathsep.join([wrapper_dir, env.get('PATH', '')])
+
+    proc = subprocess.Popen(cmd, env=env)
+    for signum in [signal.SIGINT, signal.SIGTERM]:
+        signal.signal(signum, lambda signum, frame: proc.send_signal(signum))
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = status  # reaped above, so Popen mustn't wait
+
+    usage = {
+        'cpu_user': rusage.ru_utime,
+        'cpu_sys': rusage.ru_stime,
+        # of the largest process in the step's tree, as rusage covers the
+        # step and everything it waited for
+        'max_rss_kb': rusage.ru_maxrss,
+    }
+    if juju:
+        try:
+            with open(count_path) as f:
+                usage['juju_calls'] = len(f.readlines())
+        except FileNotFoundError:
+            usage['juju_calls'] = 0
+    shutil.rmtree(wrapper_dir, ignore_errors=True)
+    with open(usage_path, 'w') as f:
+        json.dump(usage, f)
+
+    if os.WIFSIGNALED(status):
+        sys.exit(128 + os.WTERMSIG(status))
+    sys.exit(os.WEXITSTATUS(status))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,18 @@ import requests
 
 from conjureup import __version__ as VERSION
 from conjureup.app_config import app
-from conjureup.async import submit
+from conjureup.async import DROP_NEWEST, configure_lane, submit
 
 GA_ID = "UA-1018242-61"
 SENTRY_DSN = ('https://27ee3b60dbb8412e8acf6bc159979165:'
               'b3828e6bfc05432bb35fb12f6f97fdf6@sentry.io/180147')
 TELEMETRY_ASYNC_QUEUE = "telemetry-async-queue"
 
+# telemetry is the least important background work, and is dropped rather
+# than queued up behind a slow network
+configure_lane(TELEMETRY_ASYNC_QUEUE, concurrency=2, max_queued=50,
+               policy=DROP_NEWEST, priority=-1)
+
 
 def track_screen(screen_name):
     if app.notrack:
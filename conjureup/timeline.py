@@ -0,0 +1,114 @@
+""" Deployment timeline
+
+Records when each phase of a deployment starts and finishes (bootstrap,
+steps, adding machines, deploying, exposing and relating applications),
+when events are set or cleared, and every unit status transition.  The
+timeline is written to the spell directory on shutdown as timeline.txt
+and, with --timeline-trace, as Chrome trace-event JSON (timeline.json,
+viewable in chrome://tracing) to show the deployment's critical path.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from conjureup.app_config import app
+
+_start = time.time()
+_spans = []
+_instants = []
+_unit_states = {}
+
+
+def add_span(category, name, start, end, **args):
+    """ Records a phase which ran from start to end
+    """
+    _spans.append((start, end, category, name, args))
+
+
+def record(category, name, **args):
+    """ Records something which happened now
+    """
+    _instants.append((time.time(), category, name, args))
+
+
+@contextmanager
+def span(category, name, **args):
+    """ Records the phase run by the with block
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        add_span(category, name, start, time.time(), **args)
+
+
+def watch_model(model):
+    """ Records unit status transitions from the model's delta stream
+    """
+    async def on_unit_change(delta, old_obj, new_obj, model):
+        if new_obj is None:
+            return
+        state = (new_obj.agent_status, new_obj.workload_status)
+        if _unit_states.get(new_obj.name) != state:
+            _unit_states[new_obj.name] = state
+            record('unit', new_obj.name,
+                   agent=state[0], workload=state[1])
+
+    model.add_observer(on_unit_change, entity_type='unit')
+
+
+def _format_args(args):
+    return ' '.join('{}={}'.format(k, v) for k, v in sorted(args.items()))
+
+
+def text():
+    """ Returns the timeline as text, one line per record in the order
+    they started, with times in seconds since conjure-up started
+    """
+    lines = []
+    for start, end, category, name, args in _spans:
+        lines.append((start, '{:>10.3f} {:>9.3f}s {:<10} {} {}'.format(
+            start - _start, end - start, category, name,
+            _format_args(args))))
+    for ts, category, name, args in _instants:
+        lines.append((ts, '{:>10.3f} {:>10} {:<10} {} {}'.format(
+            ts - _start, '', category, name, _format_args(args))))
+    lines.sort(key=lambda line: line[0])
+    return '\n'.join(line.rstrip() for _, line in lines) + '\n'
+
+
+def trace():
+    """ Returns the timeline as Chrome trace events, with each phase on its
+    own row
+    """
+    events = []
+    for tid, (start, end, category, name, args) in enumerate(
+            sorted(_spans, key=lambda s: s[0]), 1):
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1,
+                       'tid': tid, 'args': {'name': name}})
+        events.append({'name': name, 'cat': category, 'ph': 'X',
+                       'pid': 1, 'tid': tid,
+                       'ts': int((start - _start) * 1e6),
+                       'dur': int((end - start) * 1e6),
+                       'args': args})
+    for ts, category, name, args in _instants:
+        events.append({'name': name, 'cat': category, 'ph': 'i', 's': 'g',
+                       'pid': 1, 'tid': 0,
+                       'ts': int((ts - _start) * 1e6),
+                       'args': args})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def save():
+    """ Writes the timeline to the spell directory
+    """
+    spell_dir = app.config.get('spell-dir') if app.config else None
+    if not spell_dir or not (_spans or _instants):
+        return
+    with open(os.path.join(spell_dir, 'timeline.txt'), 'w') as f:
+        f.write(text())
+    if app.argv.timeline_trace:
+        with open(os.path.join(spell_dir, 'timeline.json'), 'w') as f:
+            json.dump(trace(), f)
+    app.log.info('Saved deployment timeline to {}'.format(spell_dir))
@@ -2,12 +2,18 @@ from ubuntui.frame import Frame  # noqa
 from ubuntui.views import ErrorView
 from conjureup import async
 from conjureup.app_config import app
+from conjureup.ui import messages
 from conjureup.ui.views.shutdown import ShutdownView
 from ubuntui.ev import EventLoop
 
 
 class ConjureUI(Frame):
 
+    def set_footer(self, message):
+        # coalesced, as messages can arrive faster than the screen can be
+        # redrawn
+        messages.send(super().set_footer, message)
+
     def show_exception_message(self, ex):
         errmsg = str(ex)
         errmsg += ("\n\n"
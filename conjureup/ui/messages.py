@@ -0,0 +1,64 @@
+""" Coalesced UI messages
+
+Messages can arrive far faster than anyone can read them: run_step passes
+on every line of a step's output, and a chatty step can write thousands
+of lines a second.  Rather than redrawing the screen for each, updates
+are queued here per target (e.g. the footer) and applied at most
+--ui-frame-rate times a second, with only the latest message for each
+target applied.  Every message is kept in a bounded history, so that the
+ones skipped over can still be shown.
+"""
+import time
+from collections import OrderedDict, deque
+
+from conjureup.app_config import app
+
+FRAME_RATE = 20
+HISTORY_SIZE = 1000
+
+_pending = OrderedDict()
+_history = deque(maxlen=HISTORY_SIZE)
+_flush_handle = None
+_last_flush = 0
+
+
+def frame_rate():
+    return getattr(app.argv, 'ui_frame_rate', None) or FRAME_RATE
+
+
+def send(target, message):
+    """ Queues an update
+
+    Arguments:
+    target: callable which shows the message, e.g. a widget's set_text
+    message: the message to show
+    """
+    global _flush_handle
+    _history.append((time.time(), message))
+    _pending[target] = message
+    if app.loop is None:
+        flush()
+    elif _flush_handle is None:
+        delay = max(0, _last_flush + 1 / frame_rate() - time.time())
+        _flush_handle = app.loop.call_later(delay, flush)
+
+
+def flush():
+    """ Applies the latest queued update of each target
+    """
+    global _flush_handle, _last_flush
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+    _last_flush = time.time()
+    updates = list(_pending.items())
+    _pending.clear()
+    for target, message in updates:
+        target(message)
+
+
+def history():
+    """ Returns the (time, message) of the most recent messages, oldest
+    first
+    """
+    return list(_history)
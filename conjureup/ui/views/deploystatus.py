@@ -1,4 +1,4 @@
-import random
+from collections import defaultdict
 
 from ubuntui.utils import Color, Padding
 from ubuntui.widgets.juju.service import ServiceWidget
@@ -11,53 +11,76 @@ class DeployStatusView(WidgetWrap):
     def __init__(self, app):
         self.app = app
         self.deployed = {}
+        self.rows = {}
+        self.pending = {}
+        self.flush_handle = None
         self.unit_w = None
         self.table = Table()
         super().__init__(Padding.center_80(self.table.render()))
 
     def refresh_nodes(self, applications):
-        """Adds services to the view if they don't already exist
+        """Queues unit data to be shown
 
-        Schedules UI update on main thread to avoid urwid issues with
-        changing listbox state during render.
+        Updates are applied together on the next pass of the event loop,
+        so that a burst of changes results in a single redraw and avoids
+        urwid issues with changing listbox state during render.
         """
-        for name, service in sorted(applications.items()):
-            service_w = ServiceWidget(name, service)
-            for unit in service_w.Units:
-                try:
-                    unit_w = self.deployed[unit._name]
-                except:
-                    self.deployed[unit._name] = unit
-                    unit_w = self.deployed[unit._name]
-                    self.table.addColumns(
-                        unit._name,
-                        [
-                            ('fixed', 3, getattr(unit_w, 'Icon')),
-                            ('fixed', 50, getattr(unit_w, 'Name')),
-                            ('fixed', 20, getattr(unit_w, 'AgentStatus'))
-                        ]
-                    )
+        for name, service in applications.items():
+            for unit_name, unit in service['units'].items():
+                self.pending[unit_name] = (name, unit)
+        if self.flush_handle is None:
+            self.flush_handle = self.app.loop.call_soon(self.flush)
 
-                    if not hasattr(unit_w, 'WorkloadInfo'):
-                        continue
-                    self.table.addColumns(
-                        unit._name,
-                        [
-                            ('fixed', 5, Text("")),
-                            Color.info_context(
-                                unit_w.WorkloadInfo)
-                        ],
-                        force=True)
-                self.update_ui_state(unit_w, unit._unit)
+    def flush(self):
+        """Applies queued unit data, adding rows for new units and
+        updating only the fields which changed for existing ones
+        """
+        self.flush_handle = None
+        pending, self.pending = self.pending, {}
+
+        new_units = defaultdict(dict)
+        for unit_name, (name, unit) in pending.items():
+            if unit_name not in self.deployed:
+                new_units[name][unit_name] = unit
+        for name, units in sorted(new_units.items()):
+            service_w = ServiceWidget(name, {'units': units})
+            for unit_w in sorted(service_w.Units, key=lambda u: u._name):
+                self.add_row(unit_w)
+
+        for unit_name, (name, unit) in sorted(pending.items()):
+            self.update_ui_state(self.deployed[unit_name], unit)
+
+    def add_row(self, unit_w):
+        """ Adds the table row for a unit
+        """
+        self.deployed[unit_w._name] = unit_w
+        self.table.addColumns(
+            unit_w._name,
+            [
+                ('fixed', 3, getattr(unit_w, 'Icon')),
+                ('fixed', 50, getattr(unit_w, 'Name')),
+                ('fixed', 20, getattr(unit_w, 'AgentStatus'))
+            ]
+        )
+        self.table.addColumns(
+            unit_w._name,
+            [
+                ('fixed', 5, Text("")),
+                Color.info_context(
+                    unit_w.WorkloadInfo)
+            ],
+            force=True)
 
     def status_icon_state(self, agent_state):
         if agent_state == "maintenance" \
            or agent_state == "allocating" \
            or agent_state == "executing":
-            pending_status = [("pending_icon", "\N{CIRCLED BULLET}"),
-                              ("pending_icon", "\N{CIRCLED WHITE BULLET}"),
-                              ("pending_icon", "\N{FISHEYE}")]
-            status = random.choice(pending_status)
+            pending_status = {
+                "maintenance": ("pending_icon", "\N{CIRCLED BULLET}"),
+                "allocating": ("pending_icon", "\N{CIRCLED WHITE BULLET}"),
+                "executing": ("pending_icon", "\N{FISHEYE}"),
+            }
+            status = pending_status[agent_state]
         elif agent_state == "waiting":
             status = ("pending_icon", "\N{HOURGLASS}")
         elif agent_state == "idle" \
@@ -74,24 +97,26 @@ class DeployStatusView(WidgetWrap):
         return status
 
     def update_ui_state(self, unit_w, unit):
-        """ Updates individual machine information
+        """ Updates individual machine information, setting only the
+        fields which changed since the last update
 
         Arguments:
-        service: current service
         unit_w: UnitInfo widget
         unit: current unit for service
         """
-        try:
-            unit_w.Machine.set_text(unit.get('machine', '-'))
-            unit_w.PublicAddress.set_text(unit.get('public-address') or '')
-            unit_w.WorkloadInfo.set_text(unit['workload-status']['info'])
-            if unit['workload-status']['status'] != 'unknown':
-                unit_w.AgentStatus.set_text(unit['workload-status']['status'])
-                unit_w.Icon.set_text(
-                    self.status_icon_state(unit['workload-status']['status']))
-            else:
-                unit_w.AgentStatus.set_text(unit['agent-status']['status'])
-                unit_w.Icon.set_text(
-                    self.status_icon_state(unit['agent-status']['status']))
-        except Exception:
-            raise
+        if unit['workload-status']['status'] != 'unknown':
+            status = unit['workload-status']['status']
+        else:
+            status = unit['agent-status']['status']
+        row = {
+            'Machine': unit.get('machine', '-'),
+            'PublicAddress': unit.get('public-address') or '',
+            'WorkloadInfo': unit['workload-status']['info'],
+            'AgentStatus': status,
+            'Icon': self.status_icon_state(status),
+        }
+        shown = self.rows.setdefault(unit_w._name, {})
+        for field, value in row.items():
+            if shown.get(field) != value:
+                getattr(unit_w, field).set_text(value)
+                shown[field] = value
@@ -7,17 +7,18 @@ import os
 import pty
 import re
 import shutil
+import signal
 import socket
 import subprocess
 import sys
+import time
 import uuid
-from collections import Mapping
+from collections import Mapping, deque
 from contextlib import contextmanager
 from functools import partial
 from pathlib import Path
 from subprocess import PIPE, Popen, check_call, check_output
 
-import aiofiles
 import yaml
 from bundleplacer.bundle import Bundle
 from bundleplacer.charmstore_api import MetadataController
@@ -26,7 +27,7 @@ from pkg_resources import parse_version
 from raven.processors import SanitizePasswordsProcessor
 from termcolor import cprint
 
-from conjureup import charm
+from conjureup import charm, progress, status_server, stepmetrics, timeline
 from conjureup.app_config import app
 from conjureup.telemetry import track_event
 
@@ -162,12 +163,165 @@ async def arun(cmd, input=None, check=False, env=None, encoding='utf8',
     return (proc.returncode, stdout_data, stderr_data)
 
 
-async def run_step(step, msg_cb, event_name=None):
-    # Define STEP_NAME for use in determining where to store
-    # our step results,
-    #  redis-cli set "conjure-up.$SPELL_NAME.$STEP_NAME.result" "val"
-    app.env['CONJURE_UP_STEP'] = step.name
+# characters of a failed step's output to report
+LOG_TAIL_SIZE = 400
+# distinct matches a LineMatcher keeps, so that memory stays bounded
+MAX_LINE_MATCHES = 100
+# seconds a terminated step has to exit before it is killed
+STEP_KILL_GRACE = 10
+
+# process of each step being run
+_running_steps = set()
+
+
+class LogTail:
+    """ Keeps the last characters of a stream of lines
+    """
+
+    def __init__(self, size=LOG_TAIL_SIZE):
+        self.size = size
+        self.lines = deque()
+        self.length = 0
+
+    def __call__(self, line):
+        self.lines.append(line)
+        self.length += len(line)
+        while self.length - len(self.lines[0]) >= self.size:
+            self.length -= len(self.lines.popleft())
+
+    def text(self):
+        return ''.join(self.lines)[-self.size:]
+
+
+class LineMatcher:
+    """ Collects something from each line of a stream matching a pattern
+    """
+
+    def __init__(self, pattern, extract=None, max_matches=MAX_LINE_MATCHES):
+        """
+        Arguments:
+        pattern: regular expression to search each line for
+        extract: optional function given the matching line, returning what
+        to collect; defaults to the line itself
+        max_matches: distinct matches to collect before ignoring new ones
+        """
+        self.pattern = re.compile(pattern)
+        self.extract = extract or (lambda line: line)
+        self.max_matches = max_matches
+        self.matches = set()
+
+    def __call__(self, line):
+        if len(self.matches) < self.max_matches and \
+                self.pattern.search(line):
+            self.matches.add(self.extract(line))
+
+
+def _hook_failure_app(line):
+    log_leader = line.split()[0]
+    unit_name = log_leader.split(':')[-1]
+    return unit_name.split('/')[0]
+
+
+def hook_failure_matcher():
+    """ Returns a LineMatcher collecting the applications with charm hook
+    failures which juju retried automatically, as logged by 00_deploy-done
+    """
+    return LineMatcher('hook failure, will retry', _hook_failure_app)
+
+
+async def _tee_stream(stream, path, *line_cbs):
+    """ Copies a subprocess's output stream to a file as it arrives
+
+    Arguments:
+    stream: asyncio StreamReader to read until EOF
+    path: file to write the output to
+    line_cbs: callbacks given each line of output
+
+    Returns:
+    Number of bytes of output
+    """
+    size = 0
+    with open(path, 'w') as f:
+        while True:
+            try:
+                line = await stream.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                # output ended without a final newline
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                # line longer than the stream's limit, so pass it on in
+                # pieces
+                line = await stream.read(e.consumed)
+            if not line:
+                break
+            size += len(line)
+            line = line.decode('utf8', 'replace')
+            f.write(line)
+            for line_cb in line_cbs:
+                line_cb(line)
+    return size
 
+
+def step_timeout(step):
+    """ Returns the seconds a step may run for, or None
+
+    Steps declare a timeout in their metadata; lifecycle steps, like
+    00_deploy-done, in the spell's metadata.yaml under step-timeouts.
+    """
+    if step.timeout:
+        return step.timeout
+    timeouts = app.config['metadata'].get('step-timeouts') or {}
+    return timeouts.get(step.name)
+
+
+def _signal_step(proc, signum):
+    try:
+        os.killpg(proc.pid, signum)
+    except ProcessLookupError:
+        pass  # already exited
+
+
+async def terminate_step(proc, grace=STEP_KILL_GRACE):
+    """ Terminates a step and everything it started
+
+    Steps are run in their own process group, which is sent SIGTERM, then
+    SIGKILL if the step hasn't exited after the grace period.
+    """
+    _signal_step(proc, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except asyncio.TimeoutError:
+        app.log.warning('Killing step process group {}'.format(proc.pid))
+        _signal_step(proc, signal.SIGKILL)
+        await proc.wait()
+
+
+async def terminate_steps():
+    """ Terminates every running step, see terminate_step
+    """
+    await asyncio.gather(*[terminate_step(proc)
+                           for proc in list(_running_steps)])
+
+
+async def run_step(step, msg_cb, event_name=None, env=None,
+                   err_matchers=None):
+    """ Runs a step's script
+
+    Arguments:
+    step: StepModel of the step to run
+    msg_cb: message callback, also given each line of the step's output
+    event_name: optional name to track the step's start and end under
+    env: optional environment for this step only, on top of app.env
+    err_matchers: optional extra LineMatchers to run over the step's
+    stderr as it streams
+
+    Returns:
+    The result the step stored in redis
+
+    Raises an exception if the step fails or runs for longer than its
+    timeout, see step_timeout.  If the step is cancelled, the step's
+    processes are terminated.
+    """
     step_path = Path(app.config['spell-dir']) / 'steps' / step.filename
 
     if not step_path.is_file():
@@ -191,41 +345,77 @@ async def run_step(step, msg_cb, event_name=None):
             'passwordless sudo required',
         ))
 
+    await status_server.start()
+
+    # Define STEP_NAME for use in determining where to store
+    # our step results,
+    #  redis-cli set "conjure-up.$SPELL_NAME.$STEP_NAME.result" "val"
+    # (steps may run concurrently, so each gets its own environment)
+    step_env = dict(app.env, CONJURE_UP_STEP=step.name)
+    step_env.update(env or {})
     app.log.debug("Executing script: {}".format(step_path))
 
-    async with aiofiles.open(step_path + ".out", 'w') as outf:
-        async with aiofiles.open(step_path + ".err", 'w') as errf:
-            proc = await asyncio.create_subprocess_exec(step_path,
-                                                        env=app.env,
-                                                        stdout=outf,
-                                                        stderr=errf)
-            async with aiofiles.open(step_path + '.out', 'r') as f:
-                while proc.returncode is None:
-                    async for line in f:
-                        msg_cb(line)
-                    await asyncio.sleep(0.01)
-
-    out_log = Path(step_path + '.out').read_text()
-    err_log = Path(step_path + '.err').read_text()
-
-    if proc.returncode != 0:
+    # the output is analysed as it streams, so that verbose steps don't
+    # have to be read back into memory
+    out_tail = LogTail()
+    err_tail = LogTail()
+    hook_failures = hook_failure_matcher()
+    usage_path = step_path + '.usage'
+    timeout = step_timeout(step)
+    timed_out = False
+    start = time.time()
+    with timeline.span('step', step.name):
+        # in a new session, so that the step and everything it starts can
+        # be terminated together
+        proc = await asyncio.create_subprocess_exec(
+            *stepmetrics.wrap_command(usage_path, [step_path]),
+            env=step_env,
+            stdout=PIPE,
+            stderr=PIPE,
+            start_new_session=True)
+        _running_steps.add(proc)
+        try:
+            output_sizes, _ = await asyncio.wait_for(asyncio.gather(
+                asyncio.gather(
+                    _tee_stream(proc.stdout, step_path + '.out', msg_cb,
+                                out_tail),
+                    _tee_stream(proc.stderr, step_path + '.err', err_tail,
+                                hook_failures, *(err_matchers or []))),
+                proc.wait()), timeout)
+        except asyncio.TimeoutError:
+            app.log.error('Step {} timed out after {}s'.format(step.name,
+                                                               timeout))
+            timed_out = True
+            await terminate_step(proc)
+            output_sizes = [os.path.getsize(step_path + '.out'),
+                            os.path.getsize(step_path + '.err')]
+        except asyncio.CancelledError:
+            app.log.info('Terminating step {}'.format(step.name))
+            await terminate_step(proc)
+            raise
+        finally:
+            _running_steps.discard(proc)
+    stepmetrics.record(step.name,
+                       wall_time=time.time() - start,
+                       output_bytes=sum(output_sizes),
+                       returncode=proc.returncode,
+                       **stepmetrics.read_usage(usage_path))
+
+    if timed_out or proc.returncode != 0:
         app.sentry.context.merge({'extra': {
-            'out_log_tail': out_log[-400:],
-            'err_log_tail': err_log[-400:],
+            'out_log_tail': out_tail.text(),
+            'err_log_tail': err_tail.text(),
         }})
+        if timed_out:
+            raise Exception("Step {} timed out after {} seconds".format(
+                step.filename, timeout))
         raise Exception("Failure in step {}".format(step.filename))
 
     # special case for 00_deploy-done to report masked
     # charm hook failures that were retried automatically
     if not app.noreport:
-        failed_apps = set()  # only report each charm once
-        for line in err_log.splitlines():
-            if 'hook failure, will retry' in line:
-                log_leader = line.split()[0]
-                unit_name = log_leader.split(':')[-1]
-                app_name = unit_name.split('/')[0]
-                failed_apps.add(app_name)
-        for app_name in failed_apps:
+        # matches are distinct, so each charm is only reported once
+        for app_name in hook_failures.matches:
             # report each individually so that Sentry will give us a
             # breakdown of failures per-charm in addition to per-spell
             sentry_report('Retried hook failure', tags={
@@ -340,7 +530,9 @@ def snap_version():
 
 
 def send_msg(msg, label, color, attrs=['bold']):
-    if app.argv.debug:
+    if progress.enabled():
+        progress.emit('log', level=label, message=msg.rstrip())
+    elif app.argv.debug:
         print("[{}] {}".format(label, msg))
     elif sys.__stdin__.isatty():
         cprint("[{}] ".format(label),
@@ -508,6 +700,10 @@ def setup_metadata_controller():
     bundle = Bundle(bundle_data=bundle_data)
     app.metadata_controller = MetadataController(bundle, Config('bundle-cfg'))
 
+    # resolve unrevisioned charms in the background, well ahead of deploy
+    from conjureup import juju  # circular import
+    juju.prefetch_charms(bundle.services)
+
 
 def set_chosen_spell(spell_name, spell_dir):
     track_event("Spell Choice", spell_name, "")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+#
+# tests charm.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from conjureup import charm
+
+
+class CharmResolveRevisionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.app_patcher = patch.object(charm, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.argv.cache_dir = self.cache_dir.name
+        self.channel_info_patcher = patch.object(charm, 'get_channel_info')
+        self.mock_channel_info = self.channel_info_patcher.start()
+        self.mock_channel_info.return_value = {'Id': 'cs:xenial/mysql-58'}
+        charm._revision_cache = None
+
+    def tearDown(self):
+        charm._revision_cache = None
+        self.app_patcher.stop()
+        self.channel_info_patcher.stop()
+        self.cache_dir.cleanup()
+
+    def test_resolve_revision(self):
+        "_resolve_revision queries the charm store without the cs: prefix"
+        assert charm._resolve_revision('cs:xenial/mysql',
+                                       'stable') == 'cs:xenial/mysql-58'
+        self.mock_channel_info.assert_called_once_with('xenial/mysql',
+                                                       'stable')
+
+    def test_resolve_revision_cached_on_disk(self):
+        "_resolve_revision reuses results from a previous run"
+        charm._resolve_revision('cs:xenial/mysql', 'stable')
+        charm._revision_cache = None  # simulate a new run
+        assert charm._resolve_revision('cs:xenial/mysql',
+                                       'stable') == 'cs:xenial/mysql-58'
+        assert self.mock_channel_info.call_count == 1
+
+    def test_resolve_revision_cache_expires(self):
+        "_resolve_revision queries again once the cache entry expires"
+        charm._resolve_revision('cs:xenial/mysql', 'stable')
+        with patch.object(charm, 'REVISION_CACHE_TTL', 0):
+            charm._resolve_revision('cs:xenial/mysql', 'stable')
+        assert self.mock_channel_info.call_count == 2
+
+    def test_resolve_revision_per_channel(self):
+        "_resolve_revision caches each channel separately"
+        charm._resolve_revision('cs:xenial/mysql', 'stable')
+        charm._resolve_revision('cs:xenial/mysql', 'edge')
+        assert self.mock_channel_info.call_count == 2
@@ -10,6 +10,8 @@ from unittest.mock import MagicMock, call, patch
 
 from conjureup.controllers.clouds.gui import CloudsController
 
+from .helpers import AsyncMock, test_loop
+
 
 class CloudsGUIRenderTestCase(unittest.TestCase):
 
@@ -22,18 +24,25 @@ class CloudsGUIRenderTestCase(unittest.TestCase):
 
         self.view_patcher = patch(
             'conjureup.controllers.clouds.gui.CloudView')
-        self.view_patcher.start()
+        self.mock_view = self.view_patcher.start()
+        self.wait_view_patcher = patch(
+            'conjureup.controllers.clouds.gui.BootstrapWaitView')
+        self.wait_view_patcher.start()
         self.app_patcher = patch(
             'conjureup.controllers.clouds.gui.app')
-        mock_app = self.app_patcher.start()
-        mock_app.ui = MagicMock(name="app.ui")
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.ui = MagicMock(name="app.ui")
         self.list_clouds_patcher = patch(
             'conjureup.juju.get_compatible_clouds')
         self.mock_list_clouds = self.list_clouds_patcher.start()
         self.mock_list_clouds.return_value = ['test1', 'test2']
         self.get_clouds_patcher = patch(
-            'conjureup.juju.get_clouds')
-        self.mock_get_clouds_patcher = self.get_clouds_patcher.start()
+            'conjureup.juju.aget_clouds', AsyncMock())
+        self.mock_get_clouds = self.get_clouds_patcher.start()
+        self.mock_get_clouds.return_value = {
+            'test1': {'type': 'test1', 'defined': 'public'},
+            'test2': {'type': 'test2', 'defined': 'local'},
+        }
 
         self.track_screen_patcher = patch(
             'conjureup.controllers.clouds.gui.track_screen')
@@ -42,6 +51,7 @@ class CloudsGUIRenderTestCase(unittest.TestCase):
     def tearDown(self):
         self.finish_patcher.stop()
         self.view_patcher.stop()
+        self.wait_view_patcher.stop()
         self.app_patcher.stop()
         self.list_clouds_patcher.stop()
         self.get_clouds_patcher.stop()
@@ -49,7 +59,17 @@ class CloudsGUIRenderTestCase(unittest.TestCase):
 
     def test_render(self):
         "call render"
+        self.mock_app.loop.create_task.side_effect = lambda coro: coro.close()
         self.controller.render()
+        assert self.mock_app.ui.set_body.called
+        assert self.mock_app.loop.create_task.called
+
+    def test_render_clouds(self):
+        "clouds are loaded in the background"
+        with test_loop() as loop:
+            loop.run_until_complete(self.controller._render_clouds())
+        self.mock_view.assert_called_once_with(
+            self.mock_app, ['test1'], ['test2'], cb=self.controller.finish)
 
 
 class CloudsGUIFinishTestCase(unittest.TestCase):
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# tests controllers/deploy/changeset.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import unittest
+from unittest.mock import MagicMock
+
+from conjureup.controllers.deploy import changeset
+
+
+def mock_service(name, charm, relations=(), expose=False):
+    service = MagicMock(service_name=name, expose=expose,
+                        relations=list(relations))
+    service.csid.as_str.return_value = charm
+    return service
+
+
+class DeployChangesetPlanTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.services = [
+            mock_service('mysql', 'cs:mysql-1',
+                         relations=[('wordpress:db', 'mysql:db')]),
+            mock_service('wordpress', 'cs:wordpress-2', expose=True,
+                         relations=[('wordpress:db', 'mysql:db')]),
+            mock_service('wordpress-2', 'cs:wordpress-2'),
+        ]
+        self.changes = changeset.plan(self.services)
+
+    def test_charms_added_once(self):
+        "plan adds each unique charm once"
+        charm_changes = [c for c in self.changes.values()
+                         if c.method == 'addCharm']
+        assert len(charm_changes) == 2
+        wordpress = self.changes['addCharm-cs:wordpress-2']
+        assert wordpress.args['services'] == self.services[1:]
+
+    def test_requirements(self):
+        "plan orders deploys, exposes and relations"
+        assert self.changes['deploy-wordpress'].requires == {
+            'addCharm-cs:wordpress-2'}
+        assert self.changes['expose-wordpress'].requires == {
+            'deploy-wordpress'}
+        assert 'expose-mysql' not in self.changes
+
+    def test_relations_deduplicated(self):
+        "plan adds each relation once, after both ends are deployed"
+        rel_changes = [c for c in self.changes.values()
+                       if c.method == 'addRelation']
+        assert len(rel_changes) == 1
+        assert rel_changes[0].requires == {'deploy-mysql',
+                                           'deploy-wordpress'}
@@ -11,7 +11,7 @@ from unittest.mock import MagicMock, patch
 
 from conjureup.controllers.deploy import common
 
-from .helpers import test_loop
+from .helpers import AsyncMock, test_loop
 
 
 class DeployCommonDoDeployTestCase(unittest.TestCase):
@@ -37,9 +37,11 @@ class DeployCommonDoDeployTestCase(unittest.TestCase):
         self.mock_juju = self.juju_patcher.start()
 
         self.mock_pre_deploy.return_value = dummy()
-        self.mock_juju.add_machines.return_value = dummy()
-        self.mock_juju.deploy_service.return_value = dummy()
-        self.mock_juju.set_relations.return_value = dummy()
+        self.mock_juju.add_machines = AsyncMock(return_value={})
+        self.mock_juju.deploy_service = AsyncMock()
+        self.mock_juju.expose_service = AsyncMock()
+        self.mock_juju.add_relation = AsyncMock()
+        self.mock_juju.aget_clouds = AsyncMock()
 
     def tearDown(self):
         self.pre_deploy_patcher.stop()
@@ -51,7 +53,9 @@ class DeployCommonDoDeployTestCase(unittest.TestCase):
     def test_do_deploy(self):
         "call do_deploy"
         self.mock_app.metadata_controller.bundle.services = [
-            MagicMock(service_name='service'),
+            MagicMock(service_name='service',
+                      relations=[('service:db', 'other:db')]),
+            MagicMock(service_name='other', relations=[]),
         ]
 
         msg_cb = MagicMock()
@@ -66,4 +70,6 @@ class DeployCommonDoDeployTestCase(unittest.TestCase):
         assert self.mock_pre_deploy.called
         assert self.mock_juju.add_machines.called
         assert self.mock_juju.deploy_service.called
-        assert self.mock_juju.set_relations.called
+        assert self.mock_juju.deploy_service.call_count == 2
+        self.mock_juju.add_relation.assert_called_once_with(
+            ('other:db', 'service:db'), msg_cb=msg_cb)
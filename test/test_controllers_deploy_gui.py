@@ -10,6 +10,8 @@ from unittest.mock import MagicMock, patch
 
 from conjureup.controllers.deploy.gui import DeployController
 
+from .helpers import AsyncMock, test_loop
+
 
 class DeployGUIRenderTestCase(unittest.TestCase):
     def setUp(self):
@@ -41,3 +43,52 @@ class DeployGUIRenderTestCase(unittest.TestCase):
         "call render"
         self.controller.render()
         assert self.mock_app.loop.create_task.called
+
+
+class DeployGUIRefreshTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app_patcher = patch(
+            'conjureup.controllers.deploy.gui.app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.metadata_controller.bundle.services = [
+            MagicMock(service_name='mysql', num_units=1),
+        ]
+        self.mock_app.juju.client.applications = {}
+        self.events_patcher = patch(
+            'conjureup.controllers.deploy.gui.events')
+        self.mock_events = self.events_patcher.start()
+        self.mock_events.ModelConnected.wait = AsyncMock()
+        self.mock_events.ModelSettled.is_set.return_value = False
+        self.mock_events.Error.is_set.return_value = False
+
+        self.controller = DeployController()
+        self.view = MagicMock()
+
+    def tearDown(self):
+        self.app_patcher.stop()
+        self.events_patcher.stop()
+
+    def test_refresh_deltas(self):
+        "only changed units are pushed to the view"
+        unit = MagicMock(application='mysql', public_address='10.0.0.1',
+                         machine_id='0', agent_status='idle',
+                         agent_status_message='',
+                         workload_status='active',
+                         workload_status_message='ready')
+        unit.name = 'mysql/0'
+
+        with test_loop() as loop:
+            loop.run_until_complete(self.controller._refresh(self.view))
+            on_unit_change = \
+                self.mock_app.juju.client.add_observer.call_args[0][0]
+            self.view.refresh_nodes.assert_called_once_with(
+                {'mysql': {'units': {
+                    'mysql/0': self.controller._unit_view_data()}}})
+
+            loop.run_until_complete(on_unit_change(None, None, unit, None))
+            loop.run_until_complete(on_unit_change(None, None, unit, None))
+
+        assert self.view.refresh_nodes.call_count == 2
+        self.view.refresh_nodes.assert_called_with(
+            {'mysql': {'units': {
+                'mysql/0': self.controller._unit_view_data(unit)}}})
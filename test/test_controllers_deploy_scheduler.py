@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# tests controllers/deploy/scheduler.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from conjureup.controllers.deploy.scheduler import Scheduler
+
+from .helpers import test_loop
+
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch(
+            'conjureup.controllers.deploy.scheduler.app')
+        self.mock_app = self.app_patcher.start()
+        self.started = []
+        self.running = set()
+        self.max_running = 0
+
+    def tearDown(self):
+        self.app_patcher.stop()
+
+    def _node(self, name, fail=False):
+        async def func():
+            self.started.append(name)
+            self.running.add(name)
+            self.max_running = max(self.max_running, len(self.running))
+            # let the other running nodes start
+            step = asyncio.Future()
+            asyncio.get_event_loop().call_soon(step.set_result, None)
+            await step
+            self.running.discard(name)
+            if fail:
+                raise Exception('{} failed'.format(name))
+        return func
+
+    def test_requirements(self):
+        "Scheduler starts nodes only after their requirements"
+        scheduler = Scheduler()
+        scheduler.add('relate', self._node('relate'),
+                      requires=['deploy a', 'deploy b'])
+        scheduler.add('deploy a', self._node('deploy a'),
+                      requires=['machines'])
+        scheduler.add('deploy b', self._node('deploy b'))
+        scheduler.add('machines', self._node('machines'))
+
+        with test_loop() as loop:
+            loop.run_until_complete(scheduler.run())
+
+        assert self.started.index('machines') < self.started.index('deploy a')
+        assert self.started[-1] == 'relate'
+        assert all(n.run_time is not None for n in scheduler.nodes.values())
+        assert 'deploy a' in scheduler.report()
+
+    def test_critical_path_first(self):
+        "Scheduler starts nodes on the longest path first"
+        scheduler = Scheduler(concurrency=1)
+        scheduler.add('a', self._node('a'))
+        scheduler.add('z', self._node('z'), weight=3)
+        scheduler.add('b', self._node('b'))
+        scheduler.add('c', self._node('c'), requires=['b'])
+        scheduler.add('d', self._node('d'), requires=['c'])
+
+        with test_loop() as loop:
+            loop.run_until_complete(scheduler.run())
+
+        assert self.started == ['b', 'z', 'c', 'a', 'd']
+        assert self.max_running == 1
+
+    def test_concurrency_limit(self):
+        "Scheduler runs no more than its concurrency limit at once"
+        scheduler = Scheduler(concurrency=2)
+        for i in range(5):
+            scheduler.add(str(i), self._node(str(i)))
+
+        with test_loop() as loop:
+            loop.run_until_complete(scheduler.run())
+
+        assert len(self.started) == 5
+        assert self.max_running == 2
+
+    def test_failure(self):
+        "Scheduler raises a node's failure and skips its dependents"
+        scheduler = Scheduler()
+        scheduler.add('a', self._node('a', fail=True))
+        scheduler.add('b', self._node('b'), requires=['a'])
+
+        with test_loop() as loop:
+            with self.assertRaises(Exception):
+                loop.run_until_complete(scheduler.run())
+
+        assert 'b' not in self.started
+
+    def test_invalid_graph(self):
+        "Scheduler rejects unknown requirements and cycles"
+        scheduler = Scheduler()
+        scheduler.add('a', self._node('a'), requires=['missing'])
+        with test_loop() as loop:
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(scheduler.run())
+
+        scheduler = Scheduler()
+        scheduler.add('a', self._node('a'), requires=['b'])
+        scheduler.add('b', self._node('b'), requires=['a'])
+        with test_loop() as loop:
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(scheduler.run())
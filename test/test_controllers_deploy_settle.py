@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# tests controllers/deploy/settle.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from conjureup.controllers.deploy.settle import SettleDetector
+
+from .helpers import test_loop
+
+
+def mock_unit(name, agent_status='idle', workload_status='active'):
+    unit = MagicMock(agent_status=agent_status,
+                     workload_status=workload_status,
+                     workload_status_message='')
+    unit.name = name
+    return unit
+
+
+class SettleDetectorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch(
+            'conjureup.controllers.deploy.settle.app')
+        self.app_patcher.start()
+        self.model = MagicMock(machines={})
+        self.units = [mock_unit('mysql/0')]
+        self.model.applications = {'mysql': MagicMock(units=self.units)}
+        self.applications = [MagicMock(service_name='mysql', num_units=1)]
+
+    def tearDown(self):
+        self.app_patcher.stop()
+
+    def _detector(self, **kwargs):
+        return SettleDetector(self.model, self.applications, **kwargs)
+
+    def test_check_settled(self):
+        "SettleDetector.check finds idle, active units settled"
+        with test_loop():
+            assert self._detector().check() == []
+
+    def test_check_pending(self):
+        "SettleDetector.check reports units still working and missing"
+        self.applications[0].num_units = 2
+        self.units[0].agent_status = 'executing'
+        with test_loop():
+            assert self._detector().check() == [
+                ('mysql', None, '1/2 units'),
+                ('mysql', 'mysql/0', 'executing'),
+            ]
+
+    def test_check_hook_retries(self):
+        "SettleDetector.check fails units which exhaust their hook retries"
+        with test_loop():
+            detector = self._detector(hook_retries=1)
+            self.units[0].workload_status = 'error'
+            assert detector.check() == [('mysql', 'mysql/0', 'error')]
+            self.units[0].workload_status = 'maintenance'
+            detector.check()
+            self.units[0].workload_status = 'error'
+            with self.assertRaises(Exception):
+                detector.check()
+
+    def test_check_machine_error(self):
+        "SettleDetector.check fails on machine provisioning errors"
+        self.model.machines = {'0': MagicMock(safe_data={
+            'agent-status': {'current': 'error', 'message': 'no capacity'}
+        })}
+        with test_loop():
+            with self.assertRaises(Exception):
+                self._detector().check()
+
+    def test_wait(self):
+        "SettleDetector.wait returns once settled for the quiet period"
+        with test_loop() as loop:
+            loop.run_until_complete(
+                self._detector(quiet_period=0).wait(MagicMock()))
+        assert self.model.add_observer.called
+
+    def test_wait_blocked(self):
+        "SettleDetector.wait fails if units stay blocked"
+        self.units[0].workload_status = 'blocked'
+        with test_loop() as loop:
+            with self.assertRaises(Exception):
+                loop.run_until_complete(
+                    self._detector(quiet_period=0).wait(MagicMock()))
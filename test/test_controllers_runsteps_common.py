@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+#
+# tests controllers/runsteps/common.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from conjureup.controllers.runsteps import common
+
+from .helpers import AsyncMock, test_loop
+
+
+def mock_step(name, after=(), parallel=False):
+    step = MagicMock(after=list(after), parallel=parallel)
+    step.name = name
+    return step
+
+
+class RunStepsCommonTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch(
+            'conjureup.controllers.runsteps.common.app')
+        self.mock_app = self.app_patcher.start()
+        self.scheduler_app_patcher = patch(
+            'conjureup.controllers.deploy.scheduler.app')
+        self.scheduler_app_patcher.start()
+        self.steps = [
+            mock_step('step-01_setup'),
+            mock_step('step-02_kubectl', parallel=True),
+            mock_step('step-03_dashboard', parallel=True),
+            mock_step('step-04_summary'),
+            mock_step('step-05_extra', after=['step-02_kubectl']),
+        ]
+
+    def tearDown(self):
+        self.scheduler_app_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_step_requirements(self):
+        "step_requirements follows after and parallel declarations"
+        requirements = [(step.name, requires) for step, requires
+                        in common.step_requirements(self.steps)]
+        assert requirements == [
+            ('step-01_setup', []),
+            ('step-02_kubectl', ['step-01_setup']),
+            ('step-03_dashboard', ['step-01_setup']),
+            ('step-04_summary', ['step-01_setup', 'step-02_kubectl',
+                                 'step-03_dashboard']),
+            ('step-05_extra', ['step-02_kubectl']),
+        ]
+
+    def test_run_steps(self):
+        "run_steps runs parallel steps together"
+        self.mock_app.steps = self.steps[:4]
+        self.mock_app.argv.step_concurrency = 4
+        running = set()
+        overlapped = []
+
+        async def run_step(step):
+            running.add(step.name)
+            overlapped.append(set(running))
+            # let the other runnable steps start
+            step_done = asyncio.Future()
+            asyncio.get_event_loop().call_soon(step_done.set_result, None)
+            await step_done
+            running.discard(step.name)
+
+        with test_loop() as loop:
+            loop.run_until_complete(common.run_steps(run_step))
+
+        assert {'step-02_kubectl', 'step-03_dashboard'} in overlapped
+        assert all(len(names) == 1 for names in overlapped
+                   if 'step-04_summary' in names
+                   or 'step-01_setup' in names)
+
+
+class RunStepsCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch(
+            'conjureup.controllers.runsteps.common.app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.config = {'spell': 'spell'}
+        self.mock_app.steps_data = {'step-01_setup': {'name': 'value'}}
+        self.mock_app.juju.client.info.uuid = 'model-uuid'
+        self.state = {}
+        self.mock_app.state.get.side_effect = self.state.get
+        self.mock_app.state.set.side_effect = \
+            lambda key, value: self.state.update({key: value.encode()})
+        self.run_step_patcher = patch(
+            'conjureup.controllers.runsteps.common.utils.run_step',
+            AsyncMock(return_value='done'))
+        self.mock_run_step = self.run_step_patcher.start()
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        script = Path(self.tmpdir.name) / 'step-01_setup'
+        script.write_text('#!/bin/bash\n')
+        Path(str(script) + '.yaml').write_text('cache: true\n')
+        self.step = MagicMock(after=[], parallel=False, cache=True,
+                              filename=str(script))
+        self.step.name = 'step-01_setup'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        self.run_step_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_do_step_cached(self):
+        "do_step skips a cached step unless its inputs change"
+        with test_loop() as loop:
+            assert loop.run_until_complete(
+                common.do_step(self.step, MagicMock())) == 'done'
+            assert loop.run_until_complete(
+                common.do_step(self.step, MagicMock())) == 'done'
+            assert self.mock_run_step.call_count == 1
+
+            self.mock_app.steps_data['step-01_setup']['name'] = 'changed'
+            loop.run_until_complete(common.do_step(self.step, MagicMock()))
+            assert self.mock_run_step.call_count == 2
+
+        cached = json.loads(
+            self.state['conjure-up.spell.step-01_setup.cache'].decode())
+        assert cached['result'] == 'done'
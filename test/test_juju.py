@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+#
+# tests juju.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from conjureup import juju
+from conjureup.events import NamedEvent
+
+from .helpers import AsyncMock, test_loop
+
+
+class JujuConfigCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.juju_dir = tempfile.TemporaryDirectory()
+        self.juju_path_patcher = patch.object(
+            juju, 'juju_path', return_value=self.juju_dir.name)
+        self.juju_path_patcher.start()
+        juju.invalidate_cache()
+
+        self.query = MagicMock(return_value={'clouds': {'aws': {}}})
+        self.query.__name__ = 'query'
+        self.cached_query = juju.cached_config(self.query)
+
+    def tearDown(self):
+        juju.invalidate_cache()
+        self.juju_path_patcher.stop()
+        self.juju_dir.cleanup()
+
+    def _touch(self, name, data='x'):
+        path = os.path.join(self.juju_dir.name, '{}.yaml'.format(name))
+        with open(path, 'w') as f:
+            f.write(data)
+
+    def test_cache_hit(self):
+        "cached_config only queries once while config is unchanged"
+        self._touch('clouds')
+        assert self.cached_query() == {'clouds': {'aws': {}}}
+        assert self.cached_query() == {'clouds': {'aws': {}}}
+        assert self.query.call_count == 1
+
+    def test_cache_args(self):
+        "cached_config caches per set of arguments"
+        self.cached_query('a')
+        self.cached_query('b')
+        self.cached_query('a')
+        assert self.query.call_count == 2
+
+    def test_cache_returns_copy(self):
+        "cached_config results can be modified by the caller"
+        result = self.cached_query()
+        result['clouds'].pop('aws')
+        assert self.cached_query() == {'clouds': {'aws': {}}}
+
+    def test_config_change_invalidates(self):
+        "cached_config re-queries when a juju config file changes"
+        self.cached_query()
+        self._touch('controllers', 'changed')
+        self.cached_query()
+        assert self.query.call_count == 2
+
+    def test_invalidate_cache(self):
+        "invalidate_cache forces a re-query"
+        self.cached_query()
+        juju.invalidate_cache()
+        self.cached_query()
+        assert self.query.call_count == 2
+
+
+class JujuSingleFlightTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(juju, 'app')
+        self.app_patcher.start()
+        juju.single_flight_saved.clear()
+
+    def tearDown(self):
+        self.app_patcher.stop()
+
+    def test_concurrent_calls_coalesced(self):
+        "single_flight shares one call between concurrent callers"
+        calls = []
+
+        @juju.single_flight
+        async def query(arg):
+            calls.append(arg)
+            await asyncio.sleep(0)
+            return arg
+
+        async def run():
+            return await asyncio.gather(query('a'), query('a'), query('b'))
+
+        with test_loop() as loop:
+            assert loop.run_until_complete(run()) == ['a', 'a', 'b']
+            assert calls == ['a', 'b']
+            assert juju.single_flight_saved[('query', ('a',), ())] == 1
+
+            # once complete, the next call runs the query again
+            loop.run_until_complete(query('a'))
+            assert calls == ['a', 'b', 'a']
+
+
+class JujuAddRelationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(juju, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.juju.relations = {}
+        self.mock_app.juju.client.add_relation = AsyncMock()
+        self.delay_patcher = patch.object(juju, 'RELATION_RETRY_DELAY', 0)
+        self.delay_patcher.start()
+        juju._relation_limit = None
+
+    def tearDown(self):
+        juju._relation_limit = None
+        self.delay_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_add_relation_once(self):
+        "add_relation adds each relation to the model once"
+        async def run():
+            await asyncio.gather(
+                juju.add_relation(('b:db', 'a:db'), MagicMock()),
+                juju.add_relation(('a:db', 'b:db'), MagicMock()))
+            await juju.add_relation(('a:db', 'b:db'), MagicMock())
+
+        with test_loop() as loop:
+            loop.run_until_complete(run())
+
+        self.mock_app.juju.client.add_relation.assert_called_once_with(
+            'a:db', 'b:db')
+
+    def test_add_relation_retry(self):
+        "add_relation retries transient errors"
+        self.mock_app.juju.client.add_relation.side_effect = [
+            ConnectionError(), None]
+
+        with test_loop() as loop:
+            loop.run_until_complete(
+                juju.add_relation(('a:db', 'b:db'), MagicMock()))
+
+        assert self.mock_app.juju.client.add_relation.call_count == 2
+
+    def test_add_relation_failure(self):
+        "add_relation can be retried by callers after it fails"
+        self.mock_app.juju.client.add_relation.side_effect = ValueError()
+
+        with test_loop() as loop:
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(
+                    juju.add_relation(('a:db', 'b:db'), MagicMock()))
+
+        assert self.mock_app.juju.relations == {}
+
+
+def mock_proc(returncode=0, stderr=b''):
+    proc = MagicMock(returncode=returncode)
+    proc.communicate = AsyncMock(return_value=(b'', stderr))
+    proc.wait = AsyncMock(return_value=returncode)
+    return proc
+
+
+class JujuModelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(juju, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.juju.controllers = {}
+        self.mock_app.current_controller = 'ctrl'
+        self.controller_patcher = patch.object(juju, 'Controller')
+        self.mock_controller_class = self.controller_patcher.start()
+        self.controller = self.mock_controller_class.return_value
+        self.controller.connect_controller = AsyncMock()
+        self.controller.disconnect = AsyncMock()
+        self.controller.get_models = AsyncMock()
+        models = []
+        for name, uuid in [('default', 'uuid-1'), ('conjure-up', 'uuid-2')]:
+            model = MagicMock(uuid=uuid)
+            model.name = name
+            models.append(MagicMock(model=model))
+        self.controller.get_models.return_value.user_models = models
+        self.exec_patcher = patch.object(juju.asyncio,
+                                         'create_subprocess_exec',
+                                         AsyncMock())
+        self.mock_exec = self.exec_patcher.start()
+        self.login_patcher = patch.object(juju, 'login', AsyncMock())
+        self.mock_login = self.login_patcher.start()
+        self.events_patcher = patch.object(juju, 'events')
+        self.mock_events = self.events_patcher.start()
+        juju.single_flight_saved.clear()
+
+    def tearDown(self):
+        self.events_patcher.stop()
+        self.login_patcher.stop()
+        self.exec_patcher.stop()
+        self.controller_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_connect_controller(self):
+        "connect_controller reuses open connections and replaces closed ones"
+        with test_loop() as loop:
+            first = loop.run_until_complete(juju.connect_controller('ctrl'))
+            first.connection.is_open = True
+            assert loop.run_until_complete(
+                juju.connect_controller('ctrl')) is first
+            assert self.controller.connect_controller.call_count == 1
+
+            first.connection.is_open = False
+            loop.run_until_complete(juju.connect_controller('ctrl'))
+        assert self.controller.disconnect.call_count == 1
+        assert self.controller.connect_controller.call_count == 2
+
+    def test_model_available(self):
+        "model_available looks the model up, raising listing errors"
+        with test_loop() as loop:
+            assert loop.run_until_complete(juju._list_models('ctrl')) == {
+                'default': 'uuid-1', 'conjure-up': 'uuid-2'}
+            assert loop.run_until_complete(juju.model_available('default'))
+            assert not loop.run_until_complete(
+                juju.model_available('missing'))
+
+            self.controller.get_models.side_effect = ConnectionError()
+            with self.assertRaises(ConnectionError):
+                loop.run_until_complete(juju.model_available('default'))
+
+    def test_add_model(self):
+        "add_model creates the model with the CLI and logs in"
+        self.mock_exec.side_effect = [mock_proc(), mock_proc()]
+        with test_loop() as loop:
+            loop.run_until_complete(
+                juju.add_model('new', 'ctrl', 'aws/us-east-1', 'cred'))
+
+        add_model, status = [c[0] for c in self.mock_exec.call_args_list]
+        assert add_model == ('juju', 'add-model', 'new', 'aws/us-east-1',
+                             '--controller', 'ctrl', '--credential', 'cred')
+        assert status == ('juju', 'status', '-m', 'ctrl:new')
+        self.mock_events.ModelAvailable.set.assert_called_once_with()
+        self.mock_login.assert_called_once_with()
+
+    def test_add_model_existing(self):
+        "add_model logs in to a model which already exists"
+        with test_loop() as loop:
+            loop.run_until_complete(
+                juju.add_model('default', 'ctrl', 'localhost'))
+        self.mock_exec.assert_not_called()
+        self.mock_login.assert_called_once_with()
+
+    def test_add_model_failure(self):
+        "add_model raises the CLI's error"
+        self.mock_exec.side_effect = [mock_proc(1, b'quota exceeded')]
+        with test_loop() as loop:
+            with self.assertRaisesRegex(Exception, 'quota exceeded'):
+                loop.run_until_complete(
+                    juju.add_model('new', 'ctrl', 'aws'))
+        self.mock_login.assert_not_called()
+
+    def test_destroy_model(self):
+        "destroy_model destroys the model with the CLI"
+        self.mock_exec.side_effect = [mock_proc(), mock_proc(1, b'denied')]
+        with test_loop() as loop:
+            loop.run_until_complete(juju.destroy_model('ctrl', 'old'))
+            with self.assertRaisesRegex(Exception, 'denied'):
+                loop.run_until_complete(juju.destroy_model('ctrl', 'old'))
+        assert self.mock_exec.call_args_list[0][0] == (
+            'juju', 'destroy-model', '-y', 'ctrl:old')
+        self.mock_events.ModelAvailable.clear.assert_called_once_with()
+
+
+class JujuAddMachinesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(juju, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.juju.machines = {}
+        self.mock_app.argv.machines_in_flight = 4
+        self.events_app_patcher = patch('conjureup.events.app')
+        self.events_app_patcher.start()
+        self.events = SimpleNamespace(
+            PreDeployComplete=MagicMock(is_set=MagicMock(return_value=True)),
+            MachinePending=NamedEvent('MachinePending'),
+            MachineCreated=NamedEvent('MachineCreated'),
+            AppMachinesCreated=MagicMock())
+        self.events_patcher = patch.object(juju, 'events', self.events)
+        self.events_patcher.start()
+        self.batch_patcher = patch.object(juju, '_add_machines_batch',
+                                          AsyncMock())
+        self.mock_batch = self.batch_patcher.start()
+        self.machines = {str(i): {'series': 'xenial'} for i in range(6)}
+
+    def tearDown(self):
+        self.batch_patcher.stop()
+        self.events_patcher.stop()
+        self.events_app_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_add_machines_batched(self):
+        "add_machines requests machines in batches of up to the limit"
+        self.mock_batch.side_effect = lambda batch: [
+            'm{}'.format(i) for i in range(len(batch))]
+        with test_loop() as loop:
+            new_machines = loop.run_until_complete(
+                juju.add_machines([], self.machines, MagicMock()))
+        assert [len(c[0][0]) for c in self.mock_batch.call_args_list] == [
+            4, 2]
+        assert new_machines['4'] == 'm0'
+        assert self.events.MachineCreated.is_set('5')
+        assert self.mock_app.juju.machines == {}
+
+    def test_add_machines_failure(self):
+        "a failed batch fails every waiter and can be retried"
+        started = asyncio.Event()
+        failure = asyncio.Future()
+
+        async def add_batch(batch):
+            started.set()
+            return await failure
+
+        self.mock_batch.side_effect = add_batch
+
+        async def run():
+            first = asyncio.ensure_future(
+                juju.add_machines([], self.machines, MagicMock()))
+            await started.wait()
+            # waits for the machines the first call is adding
+            second = asyncio.ensure_future(
+                juju.add_machines([], {'0': {'series': 'xenial'}},
+                                  MagicMock()))
+            await asyncio.wait([second], timeout=0)
+            failure.set_exception(ValueError('no capacity'))
+            return await asyncio.gather(first, second,
+                                        return_exceptions=True)
+
+        with test_loop() as loop:
+            results = loop.run_until_complete(run())
+        assert [type(r) for r in results] == [ValueError, ValueError]
+        assert not self.events.MachinePending.is_set('0')
+        assert not self.events.MachineCreated.is_set('0')
+        assert self.mock_app.juju.machines == {}
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#
+# tests progress.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from conjureup import progress
+
+
+class ProgressTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(progress, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.headless = True
+        self.mock_app.argv.progress_format = 'jsonl'
+        self.stream = io.StringIO()
+        self.writer_patcher = patch.object(
+            progress, '_writer', progress.BufferedWriter(self.stream))
+        self.writer = self.writer_patcher.start()
+
+    def tearDown(self):
+        self.writer_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_emit(self):
+        "events are buffered and written one JSON object per line"
+        progress.emit('deploy', app='mysql', unit='mysql/0',
+                      status='active', message=None)
+        progress.emit('step', step='00_deploy-done', status='completed')
+        assert self.stream.getvalue() == ''
+        assert self.mock_app.loop.call_later.call_count == 1
+
+        progress.flush()
+        events = [json.loads(line)
+                  for line in self.stream.getvalue().splitlines()]
+        assert [e['phase'] for e in events] == ['deploy', 'step']
+        assert 'message' not in events[0]
+        assert events[0]['unit'] == 'mysql/0'
+
+    def test_emit_disabled(self):
+        "nothing is emitted unless jsonl progress is enabled"
+        self.mock_app.argv.progress_format = 'text'
+        progress.emit('deploy', status='started')
+        progress.flush()
+        assert self.stream.getvalue() == ''
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+# tests status_server.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import asyncio
+import json
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from conjureup import status_server
+
+from .helpers import test_loop
+
+
+def mock_entity(safe_data, **kwargs):
+    entity = MagicMock(safe_data=safe_data, **kwargs)
+    if 'name' in safe_data:
+        entity.name = safe_data['name']
+    return entity
+
+
+class StatusServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(status_server, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.env = {}
+        self.mock_app.juju.authenticated = True
+        self.mock_app.current_controller = 'localhost'
+        self.mock_app.current_model = 'conjure-up'
+        model = self.mock_app.juju.client
+        unit = mock_entity({
+            'name': 'mysql/0',
+            'machine-id': '0/lxd/1',
+            'workload-status': {'current': 'active', 'message': 'ready'},
+            'agent-status': {'current': 'idle', 'message': ''},
+        })
+        model.applications = {
+            'mysql': mock_entity({'charm-url': 'cs:mysql-1'}, units=[unit]),
+            'wordpress': mock_entity({'charm-url': 'cs:wordpress-2'},
+                                     units=[]),
+        }
+        model.relations = [mock_entity({'endpoints': [
+            {'application-name': 'mysql', 'relation': {'name': 'db'}},
+            {'application-name': 'wordpress', 'relation': {'name': 'db'}},
+        ]})]
+        model.machines = {
+            '0': mock_entity({'agent-status': {'current': 'started'}}),
+            '1': mock_entity({'agent-status': {'current': 'started'}}),
+        }
+
+    def tearDown(self):
+        self.app_patcher.stop()
+
+    def test_snapshot(self):
+        "snapshot answers in the shape of juju status"
+        status = status_server.snapshot(['mysql'])
+        mysql = status['applications']['mysql']
+        assert list(status['applications']) == ['mysql']
+        assert mysql['relations'] == {'db': ['wordpress']}
+        assert mysql['units']['mysql/0']['workload-status'] == {
+            'current': 'active', 'message': 'ready'}
+        assert list(status['machines']) == ['0']
+
+    def test_serve(self):
+        "status is served on the socket until stopped"
+        async def query():
+            path = self.mock_app.env['CONJURE_UP_STATUS_SOCKET']
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{"query": "status"}\n')
+            response = json.loads((await reader.readline()).decode())
+            writer.close()
+            return response
+
+        with test_loop() as loop:
+            loop.run_until_complete(status_server.start())
+            path = self.mock_app.env['CONJURE_UP_STATUS_SOCKET']
+            response = loop.run_until_complete(query())
+            loop.run_until_complete(status_server.stop())
+
+        assert sorted(response['applications']) == ['mysql', 'wordpress']
+        assert 'CONJURE_UP_STATUS_SOCKET' not in self.mock_app.env
+        assert not os.path.exists(path)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#
+# tests stepmetrics.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from conjureup import stepmetrics
+
+
+class StepMetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(stepmetrics, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.spell_dir = tempfile.TemporaryDirectory()
+        self.mock_app.config = {'spell-dir': self.spell_dir.name}
+        self.metrics_patcher = patch.object(stepmetrics, '_metrics', [])
+        self.metrics_patcher.start()
+
+    def tearDown(self):
+        self.metrics_patcher.stop()
+        self.spell_dir.cleanup()
+        self.app_patcher.stop()
+
+    def test_save(self):
+        "step metrics are saved with the step's resource usage"
+        usage_path = os.path.join(self.spell_dir.name, 'step.usage')
+        with open(usage_path, 'w') as f:
+            json.dump({'cpu_user': 1.5, 'juju_calls': 3}, f)
+        stepmetrics.record('00_deploy-done', wall_time=10.0,
+                           output_bytes=2048,
+                           **stepmetrics.read_usage(usage_path))
+        stepmetrics.record('step-01_setup', wall_time=1.0,
+                           output_bytes=0,
+                           **stepmetrics.read_usage(usage_path + '.missing'))
+        stepmetrics.save()
+
+        with open(os.path.join(self.spell_dir.name,
+                               'step-metrics.json')) as f:
+            metrics = json.load(f)
+        assert metrics == [
+            {'step': '00_deploy-done', 'wall_time': 10.0,
+             'output_bytes': 2048, 'cpu_user': 1.5, 'juju_calls': 3},
+            {'step': 'step-01_setup', 'wall_time': 1.0, 'output_bytes': 0},
+        ]
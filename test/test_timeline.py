@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# tests timeline.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from conjureup import timeline
+
+
+class TimelineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(timeline, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.spell_dir = tempfile.TemporaryDirectory()
+        self.mock_app.config = {'spell-dir': self.spell_dir.name}
+        self.spans_patcher = patch.object(timeline, '_spans', [])
+        self.spans_patcher.start()
+        self.instants_patcher = patch.object(timeline, '_instants', [])
+        self.instants_patcher.start()
+
+    def tearDown(self):
+        self.instants_patcher.stop()
+        self.spans_patcher.stop()
+        self.spell_dir.cleanup()
+        self.app_patcher.stop()
+
+    def test_save(self):
+        "timeline is saved as text and trace events"
+        self.mock_app.argv.timeline_trace = True
+        with timeline.span('step', 'pre-deploy'):
+            timeline.record('event', 'PreDeployComplete', action='set')
+
+        timeline.save()
+
+        with open(os.path.join(self.spell_dir.name, 'timeline.txt')) as f:
+            lines = f.read().splitlines()
+        assert lines[0].split()[2:] == ['step', 'pre-deploy']
+        assert lines[1].split()[1:] == ['event', 'PreDeployComplete',
+                                        'action=set']
+        with open(os.path.join(self.spell_dir.name, 'timeline.json')) as f:
+            events = json.load(f)['traceEvents']
+        assert [e['ph'] for e in events] == ['M', 'X', 'i']
+
+    def test_save_empty(self):
+        "nothing is saved when nothing was recorded"
+        timeline.save()
+        assert os.listdir(self.spell_dir.name) == []
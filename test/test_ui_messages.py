@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#
+# tests ui/messages.py
+#
+# Copyright 2017 Canonical, Ltd.
+
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from conjureup.ui import messages
+
+
+class UIMessagesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app_patcher = patch.object(messages, 'app')
+        self.mock_app = self.app_patcher.start()
+        self.mock_app.argv.ui_frame_rate = 20
+        self.pending_patcher = patch.object(messages, '_pending',
+                                            messages.OrderedDict())
+        self.pending_patcher.start()
+        self.history_patcher = patch.object(messages, '_history',
+                                            messages.deque(maxlen=3))
+        self.history_patcher.start()
+
+    def tearDown(self):
+        messages.flush()
+        self.history_patcher.stop()
+        self.pending_patcher.stop()
+        self.app_patcher.stop()
+
+    def test_send(self):
+        "only the latest message for each target is shown per frame"
+        footer = MagicMock()
+        progress = MagicMock()
+        for line in range(5):
+            messages.send(footer, 'line {}'.format(line))
+        messages.send(progress, 'deploying')
+        assert self.mock_app.loop.call_later.call_count == 1
+        footer.assert_not_called()
+
+        messages.flush()
+        footer.assert_called_once_with('line 4')
+        progress.assert_called_once_with('deploying')
+        assert [message for _, message in messages.history()] == [
+            'line 3', 'line 4', 'deploying']
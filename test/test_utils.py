@@ -7,6 +7,8 @@
 
 import asyncio
 import logging
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -100,3 +102,50 @@ class UtilsTestCase(unittest.TestCase):
                 'juju_version': '2.j',
                 'lxd_version': '2.l',
             })
+
+
+class UtilsTeeStreamTestCase(unittest.TestCase):
+
+    def test_tee_stream(self):
+        "_tee_stream copies output to a file and passes on each line"
+        lines = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'step.out')
+            with test_loop() as loop:
+                stream = asyncio.StreamReader(limit=8)
+                stream.feed_data(b'one\nan over-long line\n')
+                stream.feed_eof()
+                loop.run_until_complete(
+                    utils._tee_stream(stream, path, lines.append))
+            with open(path) as f:
+                assert f.read() == 'one\nan over-long line\n'
+        assert lines[0] == 'one\n'
+        assert ''.join(lines) == 'one\nan over-long line\n'
+
+    def test_log_analysis(self):
+        "LogTail and hook_failure_matcher analyse output line by line"
+        tail = utils.LogTail(size=10)
+        hook_failures = utils.hook_failure_matcher()
+        for line in ['unit-mysql-0:mysql/0 hook failure, will retry\n',
+                     'unit-mysql-0:mysql/1 hook failure, will retry\n',
+                     'unit-wiki-0:wiki/0 install\n',
+                     'done\n']:
+            tail(line)
+            hook_failures(line)
+        assert tail.text() == 'install\ndone\n'[-10:]
+        assert len(tail.lines) == 2
+        assert hook_failures.matches == {'mysql'}
+
+
+class UtilsTerminateStepTestCase(unittest.TestCase):
+
+    def test_terminate_step(self):
+        "terminate_step kills a step which ignores SIGTERM"
+        with test_loop() as loop:
+            proc = loop.run_until_complete(asyncio.create_subprocess_exec(
+                'sh', '-c', 'trap "" TERM; echo ready; sleep 30 & wait',
+                stdout=asyncio.subprocess.PIPE, start_new_session=True))
+            loop.run_until_complete(proc.stdout.readline())
+            with patch.object(utils, 'app'):
+                loop.run_until_complete(utils.terminate_step(proc, 0.2))
+        assert proc.returncode == -9